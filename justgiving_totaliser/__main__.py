@@ -1,12 +1,25 @@
 import logging
 import sys
 
-from .justgiving_totaliser import main
 
-debug = False
-if len(sys.argv) > 1 and sys.argv[1] == "debug":
-    logger = logging.getLogger()
-    logger.setLevel(logging.DEBUG)
-    debug = True
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
 
-main(debug)
+    if argv and argv[0] == "history":
+        from .history import cli
+
+        return cli(argv[1:])
+
+    debug = False
+    if argv and argv[0] == "debug":
+        logger = logging.getLogger()
+        logger.setLevel(logging.DEBUG)
+        debug = True
+
+    from .justgiving_totaliser import main as gui_main
+
+    gui_main(debug)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+from array import array
+from datetime import timedelta
+from time import time
+
+
+class RingBuffer:
+    """A fixed number of (time, value) samples, held in flat arrays of doubles
+    so that nothing is allocated per sample."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.times = array("d", bytes(8 * capacity))
+        self.values = array("d", bytes(8 * capacity))
+        self.start = 0
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def _index(self, position):
+        return (self.start + position) % self.capacity
+
+    def append(self, moment, value):
+        """Add a sample, returning the one it pushes out if the buffer is full,
+        or None."""
+
+        evicted = None
+        if self.length == self.capacity:
+            evicted = self.popleft()
+
+        index = self._index(self.length)
+        self.times[index] = moment
+        self.values[index] = value
+        self.length += 1
+        return evicted
+
+    def popleft(self):
+        index = self.start
+        self.start = (self.start + 1) % self.capacity
+        self.length -= 1
+        return self.times[index], self.values[index]
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += self.length
+        if not 0 <= position < self.length:
+            raise IndexError(position)
+        index = self._index(position)
+        return self.times[index], self.values[index]
+
+
+class DonationAnalytics:
+    """Track the total and the donations over a trailing `window` of seconds, to
+    say how quickly money is coming in.
+
+    Samples older than the window are dropped as new ones arrive, and the
+    donation count and sum are kept up to date as that happens, so each sample
+    costs O(1) amortised."""
+
+    def __init__(self, window=timedelta(hours=1), capacity=4096):
+        self.window = window.total_seconds()
+        self.totals = RingBuffer(capacity)
+        self.donations = RingBuffer(capacity)
+        self.donation_sum = 0.0
+
+    def reset(self):
+        self.totals = RingBuffer(self.totals.capacity)
+        self.donations = RingBuffer(self.donations.capacity)
+        self.donation_sum = 0.0
+
+    def _expire(self, now):
+        cutoff = now - self.window
+        # Keep one total from before the window, so there is a baseline to
+        # measure from.
+        while len(self.totals) > 1 and self.totals[1][0] <= cutoff:
+            self.totals.popleft()
+        while len(self.donations) and self.donations[0][0] <= cutoff:
+            _, amount = self.donations.popleft()
+            self.donation_sum -= amount
+
+    def add_total(self, total, now=None):
+        now = time() if now is None else now
+        self.totals.append(now, float(total))
+        self._expire(now)
+
+    def add_donations(self, amounts, now=None):
+        """Record new donations, with `amounts` in major units."""
+
+        now = time() if now is None else now
+        for amount in amounts:
+            if evicted := self.donations.append(now, float(amount or 0)):
+                self.donation_sum -= evicted[1]
+            self.donation_sum += float(amount or 0)
+        self._expire(now)
+
+    def per_hour(self):
+        """Return the rate at which the total has grown over the window, per
+        hour, or None if there isn't enough data yet."""
+
+        if len(self.totals) < 2:
+            return None
+        start_time, start_total = self.totals[0]
+        end_time, end_total = self.totals[-1]
+        if end_time <= start_time:
+            return None
+        return (end_total - start_total) / (end_time - start_time) * 3600
+
+    def donations_per_minute(self, now=None):
+        now = time() if now is None else now
+        self._expire(now)
+        if not len(self.totals):
+            return 0.0
+        span = min(self.window, now - self.totals[0][0])
+        if span <= 0:
+            return 0.0
+        return len(self.donations) / span * 60
+
+    def time_to(self, amount):
+        """Return how long until the total reaches `amount` at the current
+        rate, as a timedelta, or None if it isn't going to."""
+
+        rate = self.per_hour()
+        if not rate or rate <= 0 or not len(self.totals):
+            return None
+        _, current = self.totals[-1]
+        if current >= amount:
+            return timedelta()
+        return timedelta(hours=(float(amount) - current) / rate)
+
+    def suggested_interval(self, interval, minimum):
+        """Scale the polling `interval` down as donations come in faster, but
+        not below `minimum`."""
+
+        return max(minimum, min(interval, interval / (1 + self.donations_per_minute())))
@@ -1,15 +1,21 @@
+from collections import deque
 from datetime import datetime, timezone
+from itertools import chain
+import json
 import logging
 import os
 import pathlib
-from time import sleep
+import tempfile
+from time import perf_counter, sleep
 
-from PyQt5.QtCore import QObject, QTimer, QUrl
+from PyQt5.QtCore import QObject, QTimer, QUrl, pyqtSignal
 from PyQt5.QtMultimedia import QMediaContent, QMediaPlayer
 from PyQt5.QtTextToSpeech import QTextToSpeech
 from PyQt5.QtWidgets import QAction
 
-from .common import format_donor
+from .common import format_amount, format_donor
+from .metrics import announcement_latency_seconds, announcement_queue_depth
+from .speech import SpeechRenderer
 
 
 _fanfares = {
@@ -17,95 +23,417 @@ _fanfares = {
     "bonus": "fanfare_bonus.mp3",
     "end": "fanfare_end.mp3",
 }
+_fanfare_path = pathlib.Path(__file__).parent / "assets"
+
+# Approximate, for estimating how long the queued announcements will take
+_fanfare_durations = {"donation": 4, "bonus": 8, "end": 13}
+_words_per_second = 2.5
+
+_priorities = {"end": 0, "bonus": 1, "donation": 2}
+
+
+def summarise_donations(donations, more=False, include_gift_aid=False):
+    count = len(donations)
+    message = f"{count} {'more ' if more else ''}donation{'' if count == 1 else 's'}"
+
+    known = [
+        donation.donation_amount
+        for donation in donations
+        if donation.donation_amount.value is not None
+    ]
+    currencies = {amount.currency for amount in known}
+    if len(currencies) == 1:
+        total = sum(amount.total(include_gift_aid) for amount in known)
+        message += f" totalling {format_amount(total, currencies.pop())}"
+
+    return message
 
 
 class Announcement:
-    announced = None
+    __slots__ = (
+        "fanfare",
+        "kind",
+        "donations",
+        "summarise_after",
+        "intro",
+        "include_gift_aid",
+        "_message",
+        "created",
+        "announced",
+    )
 
-    def __init__(self, message="", fanfare=None):
+    def __init__(
+        self, message="", fanfare=None, donations=None, intro="", include_gift_aid=False
+    ):
         logging.debug(f"Creating announcement, {message=}, {fanfare=}")
-        fanfare_path = pathlib.Path(__file__).parent / "assets"
-        if fanfare:
-            self.fanfare = str(fanfare_path / _fanfares[fanfare])
-        else:
-            self.fanfare = None
-
-        self.message = message
+        if fanfare and fanfare not in _fanfares:
+            raise ValueError(f"Unknown fanfare {fanfare}")
+        self.fanfare = fanfare
+        self.kind = fanfare or "donation"
+        self.donations = donations
+        self.summarise_after = None
+        self.intro = intro
+        self.include_gift_aid = include_gift_aid
+        self._message = message
         self.created = datetime.now(timezone.utc)
+        self.announced = None
 
     @classmethod
-    def from_donations(cls, donations):
+    def from_donations(cls, donations, intro="", include_gift_aid=False):
         return cls(
-            message=". ".join(
-                format_donor(donation, quotes="straight") for donation in donations
-            ),
             fanfare="donation",
+            donations=list(donations),
+            intro=intro,
+            include_gift_aid=include_gift_aid,
         )
 
+    @classmethod
+    def from_record(cls, record):
+        announcement = cls(record["message"], record["fanfare"])
+        announcement.created = datetime.fromisoformat(record["created"])
+        if record["announced"]:
+            announcement.announced = datetime.fromisoformat(record["announced"])
+        return announcement
+
+    def to_record(self):
+        return {
+            "message": self.message,
+            "fanfare": self.fanfare,
+            "created": self.created.isoformat(),
+            "announced": self.announced.isoformat() if self.announced else None,
+        }
+
+    def freeze(self):
+        """Fix the message as it is now, and drop the donations it came from."""
+
+        if self.donations is not None:
+            self._message = self.message
+            self.donations = None
+            self.summarise_after = None
+
+    @property
+    def priority(self):
+        return _priorities.get(self.kind, _priorities["donation"])
+
+    @property
+    def message(self):
+        if self.donations is None:
+            return self._message
+
+        read_out = self.donations[: self.summarise_after]
+        parts = [self.intro] if self.intro else []
+        parts += [format_donor(donation, quotes="straight") for donation in read_out]
+        if len(read_out) < len(self.donations):
+            parts.append(
+                summarise_donations(
+                    self.donations[len(read_out) :],
+                    more=bool(read_out),
+                    include_gift_aid=self.include_gift_aid,
+                )
+            )
+        return ". ".join(parts)
+
+    def estimated_duration(self):
+        duration = _fanfare_durations.get(self.kind, 0) if self.fanfare else 0
+        return duration + len(self.message.split()) / _words_per_second
+
+    def merge(self, announcement):
+        self.donations = announcement.donations + self.donations
+
+    def shorten(self, seconds):
+        """Summarise the oldest donations until the announcement is at least
+        `seconds` shorter, or nothing is left to summarise. Return the time saved.
+        """
+
+        original_duration = self.estimated_duration()
+        saved = 0
+        keep = len(self.donations[: self.summarise_after])
+        while saved < seconds and keep > 0:
+            keep -= 1
+            self.summarise_after = keep
+            saved = original_duration - self.estimated_duration()
+        return saved
+
+
+class AnnouncementQueue:
+    """Pending announcements, played in priority order (end, bonus, donation).
+
+    Unplayed donation announcements are merged into one, and once the queue
+    would take longer than `budget` seconds to play, the oldest donations in it
+    are summarised rather than read out."""
+
+    def __init__(self, budget=60):
+        self.budget = budget
+        self._queues = [deque() for _ in range(max(_priorities.values()) + 1)]
+
+    def __len__(self):
+        return sum(len(queue) for queue in self._queues)
+
+    def __iter__(self):
+        return chain.from_iterable(self._queues)
+
+    def append(self, announcement):
+        queue = self._queues[announcement.priority]
+        if (
+            announcement.donations is not None
+            and announcement.announced is None
+            and queue
+            and queue[-1].donations is not None
+            and queue[-1].announced is None
+        ):
+            queue[-1].merge(announcement)
+        else:
+            queue.append(announcement)
+        self.fit_budget()
+
+    def popleft(self):
+        for queue in self._queues:
+            if queue:
+                return queue.popleft()
+        raise IndexError("pop from an empty AnnouncementQueue")
+
+    def clear(self):
+        announcements = list(self)
+        for queue in self._queues:
+            queue.clear()
+        return announcements
+
+    @property
+    def backlog(self):
+        return sum(announcement.estimated_duration() for announcement in self)
+
+    def fit_budget(self):
+        excess = self.backlog - self.budget
+        for announcement in reversed(list(self)):
+            if excess <= 0:
+                break
+            if announcement.donations and announcement.announced is None:
+                excess -= announcement.shorten(excess)
+
+
+class AnnouncementHistory:
+    """Announcements that have been played, oldest first.
+
+    Only the most recent `max_in_memory` are kept in memory; older ones are
+    written out to a temporary file, and read back when they are replayed."""
+
+    def __init__(self, max_in_memory=100):
+        self.max_in_memory = max_in_memory
+        self.recent = deque()
+        self.spilled = 0
+        self._file = None
+
+    def __len__(self):
+        return self.spilled + len(self.recent)
+
+    def append(self, announcement):
+        announcement.freeze()
+        self.recent.append(announcement)
+        while len(self.recent) > self.max_in_memory:
+            self.spill(self.recent.popleft())
+
+    def extend(self, announcements):
+        for announcement in announcements:
+            self.append(announcement)
+
+    def spill(self, announcement):
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(prefix="justgiving_totaliser_")
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(json.dumps(announcement.to_record()).encode() + b"\n")
+        self.spilled += 1
+
+    def read_spilled(self, count, block_size=1 << 16):
+        """Return the last `count` spilled announcements, reading the file
+        backwards so that only those lines are loaded."""
+
+        if not count or not self._file:
+            return []
+
+        self._file.seek(0, os.SEEK_END)
+        position = self._file.tell()
+        data = b""
+        while position > 0 and data.count(b"\n") <= count:
+            read_size = min(block_size, position)
+            position -= read_size
+            self._file.seek(position)
+            data = self._file.read(read_size) + data
+
+        lines = data.splitlines()[-count:]
+        return [Announcement.from_record(json.loads(line)) for line in lines]
+
+    def last(self, count):
+        if count <= 0:
+            return []
+        recent = list(self.recent)[-count:]
+        return self.read_spilled(count - len(recent)) + recent
+
 
 class Announcer(QObject):
-    def __init__(self, *, tts=False):
-        self.previous_announcements = []
-        self.pending_announcements = []
+    """Play queued announcements one at a time: a fanfare, followed by the
+    message read out either from pre-rendered speech or by live TTS."""
+
+    started_playing = pyqtSignal(float)
+
+    def __init__(self, *, tts=False, backlog_budget=60, render_wait=3000):
+        super().__init__()
+        self.previous_announcements = AnnouncementHistory()
+        self.pending_announcements = AnnouncementQueue(budget=backlog_budget)
+        self.current = None
+        self.latencies = deque(maxlen=100)
+        self._started = None
+
+        # Load each fanfare once, rather than re-opening the file every time
+        self.fanfares = {}
+        for name, filename in _fanfares.items():
+            player = QMediaPlayer()
+            player.setVolume(100)
+            player.setMedia(
+                QMediaContent(QUrl.fromLocalFile(str(_fanfare_path / filename)))
+            )
+            player.stateChanged.connect(self.fanfare_state_changed)
+            self.fanfares[name] = player
+
+        self.speech = QMediaPlayer()
+        self.speech.setVolume(100)
+        self.speech.stateChanged.connect(self.speech_state_changed)
+
+        # How long to wait after the fanfare for speech still being rendered,
+        # before reading the message out with live TTS instead
+        self.render_wait = render_wait
+        self.render_timer = QTimer(self)
+        self.render_timer.setSingleShot(True)
+        self.render_timer.timeout.connect(lambda: self.speak(wait=False))
+
+        self.tts = None
+        self.renderer = None
         self.toggle_voice(tts)
-        self.fanfare = QMediaPlayer()
-        self.fanfare.setVolume(100)
+
+    @property
+    def backlog_budget(self):
+        return self.pending_announcements.budget
+
+    @backlog_budget.setter
+    def backlog_budget(self, budget):
+        self.pending_announcements.budget = budget
+        self.pending_announcements.fit_budget()
 
     @property
     def is_announcing(self):
-        if self.fanfare.state() == QMediaPlayer.PlayingState:
-            return True
-        if self.tts and self.tts.state() == QTextToSpeech.Speaking:
-            return True
-        return False
-
-    def announce_next(self, state=None):
-        if not (
-            self.is_announcing
-            or (self.tts and state == QTextToSpeech.Speaking)
-            or ((not self.tts) and state == QMediaPlayer.PlayingState)
-        ):
-            if self.pending_announcements:
-                announcement = self.pending_announcements.pop(0)
-                if not announcement.announced:
-                    announcement.announced = datetime.now(timezone.utc)
-                self.previous_announcements.append(announcement)
-                self._announce(announcement)
+        return self.current is not None
+
+    def prerender(self):
+        if self.renderer:
+            for announcement in self.pending_announcements:
+                self.renderer.render(announcement.message)
+
+    def announce_next(self):
+        if self.is_announcing or not self.pending_announcements:
+            return
+
+        announcement = self.pending_announcements.popleft()
+        announcement_queue_depth.set(len(self.pending_announcements))
+        if not announcement.announced:
+            announcement.announced = datetime.now(timezone.utc)
+        self.previous_announcements.append(announcement)
+        self.current = announcement
+        self._announce(announcement)
 
     def _announce(self, announcement):
+        self._started = perf_counter()
+        if self.renderer and (path := self.renderer.get(announcement.message)):
+            # Load the speech while the fanfare plays, so it can follow straight on
+            self.speech.setMedia(QMediaContent(QUrl.fromLocalFile(path)))
+        else:
+            self.speech.setMedia(QMediaContent())
+
         if announcement.fanfare:
-            self.fanfare.setMedia(
-                QMediaContent(QUrl.fromLocalFile(announcement.fanfare))
-            )
-            if self.tts:
-                self.fanfare.stateChanged.connect(
-                    lambda state: self.speak(announcement, state)
-                )
-            self.fanfare.play()
-        elif tts:
-            self.speak(announcement)
+            fanfare = self.fanfares[announcement.fanfare]
+            fanfare.setPosition(0)
+            fanfare.play()
+        else:
+            self.speak()
+
+    def speak(self, wait=True):
+        if not self.current:
+            return
+        message = self.current.message
+        if self.speech.media().isNull() and self.renderer:
+            # It may have finished rendering while the fanfare played
+            if path := self.renderer.get(message):
+                self.speech.setMedia(QMediaContent(QUrl.fromLocalFile(path)))
+            elif wait and self.renderer.rendering(message):
+                self.render_timer.start(self.render_wait)
+                return
+
+        if not self.speech.media().isNull():
+            self.speech.play()
+        elif self.tts and message:
+            self.tts.say(message)
         else:
-            self.announce_next()
+            self.finish()
+
+    def speech_rendered(self, message):
+        if self.render_timer.isActive() and self.current:
+            if message == self.current.message:
+                self.render_timer.stop()
+                self.speak(wait=False)
+
+    def finish(self):
+        self.current = None
+        self.announce_next()
+
+    def record_latency(self):
+        if self._started is not None:
+            latency = perf_counter() - self._started
+            self._started = None
+            self.latencies.append(latency)
+            announcement_latency_seconds.observe(latency)
+            self.started_playing.emit(latency)
+            logging.debug(f"Announcement started playing after {latency * 1000:.0f}ms")
 
-    def speak(self, announcement, state=None):
-        if state == QMediaPlayer.StoppedState or state is None:
-            self.fanfare.stateChanged.disconnect()
-            self.tts.say(announcement.message)
+    def fanfare_state_changed(self, state):
+        if state == QMediaPlayer.PlayingState:
+            self.record_latency()
+        elif state == QMediaPlayer.StoppedState and self.current:
+            self.speak()
+
+    def speech_state_changed(self, state):
+        if state == QMediaPlayer.PlayingState:
+            self.record_latency()
+        elif state == QMediaPlayer.StoppedState and self.current:
+            self.finish()
+
+    def tts_state_changed(self, state):
+        if state == QTextToSpeech.Speaking:
+            self.record_latency()
+        elif (
+            state in (QTextToSpeech.Ready, QTextToSpeech.BackendError) and self.current
+        ):
+            self.finish()
 
     def stop(self):
-        self.fanfare.stop()
+        self.current = None
+        self.render_timer.stop()
+        for fanfare in self.fanfares.values():
+            fanfare.stop()
+        self.speech.stop()
         if self.tts and self.tts.state() == QTextToSpeech.Speaking:
             self.tts.stop()
 
-        self.previous_announcements.extend(self.pending_announcements)
-        self.pending_announcements = []
+        self.previous_announcements.extend(self.pending_announcements.clear())
+        announcement_queue_depth.set(0)
 
     def announce(self, announcement):
         self.pending_announcements.append(announcement)
+        announcement_queue_depth.set(len(self.pending_announcements))
+        self.prerender()
         self.announce_next()
 
     def play_last(self, count):
-        self.pending_announcements.extend(self.previous_announcements[-count:])
+        for announcement in self.previous_announcements.last(count):
+            self.pending_announcements.append(announcement)
+        self.prerender()
         self.announce_next()
 
     def toggle_voice(self, use_voice):
@@ -114,12 +442,11 @@ class Announcer(QObject):
             if self.tts.state() == QTextToSpeech.BackendError:
                 logging.warn("Unable to set up TTS.")
                 self.tts = None
-                self.fanfare.stateChanged.connect(
-                    lambda state: self.announce_next(state=state)
-                )
             else:
-                self.tts.stateChanged.connect(
-                    lambda state: self.announce_next(state=state)
-                )
+                self.tts.stateChanged.connect(self.tts_state_changed)
+            if SpeechRenderer.available() and not self.renderer:
+                self.renderer = SpeechRenderer()
+                self.renderer.rendered.connect(self.speech_rendered)
         else:
             self.tts = None
+            self.renderer = None
@@ -0,0 +1,81 @@
+import logging
+import threading
+from time import monotonic
+
+
+class CircuitOpenError(RuntimeError):
+    def __init__(self, name, retry_in):
+        super().__init__(f"Not calling {name} for another {retry_in:.0f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Stop calling a backend that keeps failing.
+
+    After `failure_threshold` consecutive failures the breaker opens, and
+    entering it raises CircuitOpenError for `cool_off` seconds. After that a
+    single probe is let through (half-open); if it succeeds the breaker closes
+    again, and if not it reopens with the cool-off doubled, up to
+    `max_cool_off`."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, name, failure_threshold=3, cool_off=30, max_cool_off=300):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_cool_off = cool_off
+        self.max_cool_off = max_cool_off
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.cool_off = cool_off
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return self
+
+            retry_in = self.opened_at + self.cool_off - monotonic()
+            if self.state == self.OPEN and retry_in <= 0:
+                logging.info(f"Probing {self.name} after {self.cool_off}s")
+                self.state = self.HALF_OPEN
+                return self
+
+            raise CircuitOpenError(self.name, max(retry_in, 0))
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.record_success()
+        else:
+            self.record_failure()
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logging.info(f"{self.name} is responding again")
+            self.state = self.CLOSED
+            self.failures = 0
+            self.cool_off = self.base_cool_off
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN:
+                self.cool_off = min(self.cool_off * 2, self.max_cool_off)
+            elif self.failures < self.failure_threshold:
+                return
+
+            logging.warning(
+                f"{self.name} failed {self.failures} times; "
+                f"not calling it for {self.cool_off}s"
+            )
+            self.state = self.OPEN
+            self.opened_at = monotonic()
+
+    def reset(self):
+        self.record_success()
@@ -1,12 +1,30 @@
+from .currency import from_minor, minor_units
+
+known_currencies = {
+    "GBP": "£",
+    "USD": "$",
+    "EUR": "€",
+    "AUD": "AU$",
+    "NZD": "NZ$",
+    "CAD": "CA$",
+}
+
+
+def format_amount(amount, currency):
+    """Format `amount` minor units of the `currency` with ISO code for display."""
+
+    symbol = known_currencies.get(currency, f"{currency} ")
+    return f"{symbol}{from_minor(currency, amount):,.{minor_units(currency)}f}"
+
+
 def format_donor(donor, quotes="smart"):
     openquote = {"smart": "“", "straight": '"'}
     closequote = {"smart": "”", "straight": '"'}
 
-    if donor.amount is None:
+    amount = donor.donation_amount.describe()
+    if amount is None:
         amount = "an unknown amount"
-    elif donor.amount:
-        amount = donor.amount
-    else:
+    elif not amount:
         amount = "nothing"
 
     message = f"{donor.name} donated {amount}"
@@ -0,0 +1,168 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import json
+import logging
+import os
+import threading
+
+import requests
+
+# ISO 4217 currencies whose minor unit isn't a hundredth of the major unit
+_exponents = {
+    0: "BIF CLP DJF GNF ISK JPY KMF KRW PYG RWF UGX UYI VND VUV XAF XOF XPF",
+    3: "BHD IQD JOD KWD LYD OMR TND",
+    4: "CLF UYW",
+}
+_two_decimal = (
+    "AED AFN ALL AMD ANG AOA ARS AUD AWG AZN BAM BBD BDT BGN BMD BND BOB BRL "
+    "BSD BTN BWP BYN BZD CAD CDF CHF CNY COP CRC CUP CVE CZK DKK DOP DZD EGP "
+    "ERN ETB EUR FJD FKP GBP GEL GHS GIP GMD GTQ GYD HKD HNL HTG HUF IDR ILS "
+    "INR IRR JMD KES KGS KHR KPW KYD KZT LAK LBP LKR LRD LSL MAD MDL MGA MKD "
+    "MMK MNT MOP MRU MUR MVR MWK MXN MYR MZN NAD NGN NIO NOK NPR NZD PAB PEN "
+    "PGK PHP PKR PLN QAR RON RSD RUB SAR SBD SCR SDG SEK SGD SHP SLE SOS SRD "
+    "SSP STN SVC SYP SZL THB TJS TMT TOP TRY TTD TWD TZS UAH USD UYU UZS VES "
+    "WST XCD YER ZAR ZMW ZWL"
+)
+MINOR_UNITS = {code: 2 for code in _two_decimal.split()}
+MINOR_UNITS.update(
+    (code, exponent) for exponent, codes in _exponents.items() for code in codes.split()
+)
+
+
+class MissingRate(ValueError):
+    pass
+
+
+def minor_units(code):
+    """Return how many decimal places the minor unit of `code` is."""
+
+    return MINOR_UNITS.get(code, 2)
+
+
+def to_minor(code, amount):
+    return int(Decimal(amount).scaleb(minor_units(code)))
+
+
+def from_minor(code, amount):
+    return Decimal(amount).scaleb(-minor_units(code))
+
+
+class RateTable:
+    """Exchange rates, as units of each currency per unit of `base`.
+
+    The factor between each pair of currencies is worked out once and then
+    remembered, so converting each donation is a single multiplication."""
+
+    def __init__(self, base="GBP", rates=None, fetched=None):
+        self._lock = threading.Lock()
+        self.replace(base, rates or {}, fetched)
+
+    def replace(self, base, rates, fetched=None):
+        with self._lock:
+            self.base = base
+            self.rates = {code: Decimal(str(rate)) for code, rate in rates.items()}
+            self.rates[base] = Decimal(1)
+            self.fetched = fetched
+            self._factors = {}
+
+    def update(self, other):
+        self.replace(other.base, other.rates, other.fetched)
+
+    @classmethod
+    def from_json(cls, data):
+        fetched = data.get("fetched") or data.get("date")
+        if fetched:
+            fetched = datetime.fromisoformat(fetched)
+            if fetched.tzinfo is None:
+                fetched = fetched.replace(tzinfo=timezone.utc)
+        return cls(data["base"], data["rates"], fetched)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path) as f:
+            return cls.from_json(json.load(f))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "base": self.base,
+                    "fetched": self.fetched.isoformat() if self.fetched else None,
+                    "rates": {code: str(rate) for code, rate in self.rates.items()},
+                },
+                f,
+            )
+
+    def expired(self, max_age):
+        if self.fetched is None:
+            return True
+        return datetime.now(timezone.utc) - self.fetched > max_age
+
+    def factor(self, from_code, to_code):
+        """Return what to multiply an amount in minor units of `from_code` by
+        to get minor units of `to_code`."""
+
+        key = from_code, to_code
+        with self._lock:
+            if key in self._factors:
+                return self._factors[key]
+
+            if from_code == to_code:
+                factor = Decimal(1)
+            else:
+                try:
+                    factor = self.rates[to_code] / self.rates[from_code]
+                except KeyError as ex:
+                    raise MissingRate(f"No exchange rate for {ex.args[0]}") from None
+                factor = factor.scaleb(minor_units(to_code) - minor_units(from_code))
+            self._factors[key] = factor
+            return factor
+
+    def convert(self, amount, from_code, to_code):
+        """Convert `amount` minor units of `from_code` to minor units of
+        `to_code`."""
+
+        if from_code == to_code or amount is None:
+            return amount
+        return int((amount * self.factor(from_code, to_code)).to_integral_value())
+
+    def convert_major(self, amount, from_code, to_code):
+        if from_code == to_code or amount is None:
+            return amount
+        return from_minor(
+            to_code, self.convert(to_minor(from_code, amount), from_code, to_code)
+        )
+
+
+RATES = RateTable()
+
+
+def load_rates(path, url=None, max_age=timedelta(days=1)):
+    """Load the rate table cached at `path` into RATES. If it is missing or
+    older than `max_age` and a `url` is given, fetch a fresh one from there
+    (as JSON with "base" and "rates") and cache that instead."""
+
+    table = None
+    if os.path.exists(path):
+        try:
+            table = RateTable.from_file(path)
+        except (OSError, ValueError, KeyError) as ex:
+            logging.warning(f"Couldn't read exchange rates from {path}: {ex}")
+
+    if url and (table is None or table.expired(max_age)):
+        try:
+            response = requests.get(url, timeout=(3.05, 10))
+            response.raise_for_status()
+            table = RateTable.from_json(response.json())
+            if table.fetched is None:
+                table.fetched = datetime.now(timezone.utc)
+            table.save(path)
+        except (requests.exceptions.RequestException, ValueError, KeyError) as ex:
+            logging.warning(f"Couldn't fetch exchange rates from {url}: {ex}")
+
+    if table is None:
+        return
+    if table.expired(max_age):
+        logging.warning(f"Exchange rates in {path} are out of date")
+    RATES.update(table)
@@ -0,0 +1,177 @@
+from heapq import heapify, heappush, heappushpop, nlargest
+from itertools import count
+
+
+def same_donation(first, second):
+    """Return whether two donors are the same donation, comparing ids where
+    both have them. Donors scraped from the page have no id, so otherwise
+    compare what the page shows."""
+
+    if first.id is not None and second.id is not None:
+        return first.id == second.id
+    return (first.name, first.comment, first.amount) == (
+        second.name,
+        second.comment,
+        second.amount,
+    )
+
+
+def find_window(donors, window, partial=False):
+    """Return where `window` starts in `donors` as an unbroken run of the same
+    donations, or None if it doesn't. With `partial`, the run may be cut short
+    by the end of `donors`.
+
+    Matching the whole run, rather than any one donor, keeps a new donation
+    that happens to look like an old one, such as another anonymous £5, from
+    being taken for the old one."""
+
+    for offset in range(len(donors)):
+        run = donors[offset : offset + len(window)]
+        if len(run) < len(window) and not partial:
+            break
+        if all(same_donation(new, old) for new, old in zip(run, window)):
+            return offset
+    return None
+
+
+class DonorIndex:
+    """The current window of recent donors, newest first, with an identity for
+    each donor so that new donations can be picked out of the next window.
+
+    Donors with a server id are identified by it. Otherwise, donors are given
+    sequence numbers when first seen, which carry over to the following window
+    once the two have been lined up; this keeps apart separate donations that
+    happen to look the same, such as two anonymous £5 donations."""
+
+    def __init__(self):
+        self.donors = []
+        self.keys = []
+        self._sequence = count()
+
+    def __len__(self):
+        return len(self.donors)
+
+    def align(self, donors):
+        """Return how many donors at the start of `donors` are newer than the
+        current window, or None if the two windows don't line up."""
+
+        if not self.donors:
+            return None
+
+        first = self.donors[0]
+        for offset, donor in enumerate(donors):
+            if donor == first and all(
+                new == old for new, old in zip(donors[offset + 1 :], self.donors[1:])
+            ):
+                return offset
+        return None
+
+    def update(self, donors):
+        """Replace the window with `donors`, and return those that weren't in
+        the previous window, newest first. Return None if that can't be worked
+        out, for example the first time round, or if the windows don't overlap.
+        """
+
+        old_donors = self.donors
+        old_keys = self.keys
+
+        if donors and all(donor.id is not None for donor in donors):
+            by_id = {donor.id: donor for donor in old_donors}
+            donors = [by_id.get(donor.id, donor) for donor in donors]
+            keys = [donor.id for donor in donors]
+            # Anything after the first donor we already had is older, even if
+            # it is only now in the window because the window has grown
+            offset = next(
+                (index for index, key in enumerate(keys) if key in by_id), None
+            )
+            matched = bool(old_donors) and offset is not None
+        else:
+            offset = self.align(donors)
+            if offset is None or len(donors) < len(old_donors):
+                # Something has gone wrong; start again from this window
+                offset = len(donors)
+                matched = False
+            else:
+                matched = True
+            # Keep the donors we already had, so their first-seen times stick,
+            # and carry on with any older ones past them if the window has grown
+            overlap = min(len(donors) - offset, len(old_donors))
+            older = donors[offset + overlap :]
+            donors = donors[:offset] + old_donors[:overlap] + older
+            keys = [next(self._sequence) for _ in range(offset)]
+            keys += old_keys[:overlap]
+            keys += [next(self._sequence) for _ in older]
+
+        self.donors = donors
+        self.keys = keys
+
+        if not matched:
+            return None
+
+        old_key_set = set(old_keys)
+        return [
+            donor
+            for donor, key in zip(donors[:offset], keys[:offset])
+            if key not in old_key_set
+        ]
+
+
+class TopDonations:
+    """The `size` largest donations seen, kept in a min-heap so that each new
+    donation costs O(log size) however many have come before. Between equal
+    amounts, the earlier donation ranks higher.
+
+    Entries are (value, -sequence, donor); sequence numbers are unique, so
+    donors themselves are never compared. `value` gives what to rank donors by,
+    defaulting to their amount."""
+
+    def __init__(self, size=5, value=None):
+        self._size = size
+        self.value = value or (lambda donor: donor.amount)
+        self._heap = []
+        self._sequence = count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    @property
+    def size(self):
+        return self._size
+
+    @size.setter
+    def size(self, size):
+        """Change how many donations are kept. Growing only takes effect as new
+        donations arrive, since the ones pushed out earlier are gone."""
+
+        self._size = size
+        if len(self._heap) > size:
+            self._heap = nlargest(size, self._heap)
+            heapify(self._heap)
+
+    def add(self, donors, check_duplicates=False):
+        """Consider `donors`, newest first, for the leaderboard, and return
+        whether it changed. With `check_duplicates`, skip donors equal to one
+        already on it, for windows that may repeat donations already seen."""
+
+        changed = False
+        for donor in reversed(donors):
+            value = self.value(donor)
+            if value is None or self._size <= 0:
+                continue
+            if check_duplicates and any(donor == entry[2] for entry in self._heap):
+                continue
+
+            entry = (value, -next(self._sequence), donor)
+            if len(self._heap) < self._size:
+                heappush(self._heap, entry)
+                changed = True
+            elif entry > self._heap[0]:
+                heappushpop(self._heap, entry)
+                changed = True
+        return changed
+
+    @property
+    def donors(self):
+        """Return the top donors, largest first."""
+
+        return [donor for *_, donor in sorted(self._heap, reverse=True)]
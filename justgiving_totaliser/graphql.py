@@ -0,0 +1,121 @@
+import hashlib
+import logging
+import re
+
+from .breaker import CircuitOpenError
+
+GRAPHQL_URL = "https://graphql.justgiving.com/"
+
+_whitespace = re.compile(r"\s+")
+_around_punctuation = re.compile(r"\s*([{}():,!$])\s*")
+
+
+class Query:
+    """A GraphQL query document, minified once when it is defined, with the
+    hash used to refer to it as a persisted query."""
+
+    def __init__(self, name, document):
+        self.name = name
+        document = _whitespace.sub(" ", document).strip()
+        self.document = _around_punctuation.sub(r"\1", document)
+        self.sha256 = hashlib.sha256(self.document.encode()).hexdigest()
+
+    def __repr__(self):
+        return f"Query({self.name!r})"
+
+
+_AMOUNT = "{ value currencyCode }"
+_DONATION = f"id amount {_AMOUNT} message displayName"
+
+TOTALS = Query(
+    "Totals",
+    f"""
+    query Totals($slug: String!, $type: PageType!) {{
+      page(slug: $slug, type: $type) {{
+        targetWithCurrency {_AMOUNT}
+        donationSummary {{ totalAmount {_AMOUNT} }}
+      }}
+    }}""",
+)
+
+RECENT_DONATIONS = Query(
+    "RecentDonations",
+    f"""
+    query RecentDonations($slug: String!, $type: PageType!, $count: Int!) {{
+      page(slug: $slug, type: $type) {{
+        donations(last: $count) {{ nodes {{ {_DONATION} }} }}
+      }}
+    }}""",
+)
+
+# Everything the overlays need in one request, for when the page is down
+TOTALS_AND_DONATIONS = Query(
+    "TotalsAndDonations",
+    f"""
+    query TotalsAndDonations($slug: String!, $type: PageType!, $count: Int!) {{
+      page(slug: $slug, type: $type) {{
+        targetWithCurrency {_AMOUNT}
+        donationSummary {{ totalAmount {_AMOUNT} }}
+        donations(last: $count) {{ nodes {{ {_DONATION} }} }}
+      }}
+    }}""",
+)
+
+DONATIONS_BEFORE = Query(
+    "DonationsBefore",
+    f"""
+    query DonationsBefore($slug: String!, $type: PageType!, $count: Int!, $before: String) {{
+      page(slug: $slug, type: $type) {{
+        donations(last: $count, before: $before) {{
+          pageInfo {{ hasPreviousPage startCursor }}
+          nodes {{ {_DONATION} }}
+        }}
+      }}
+    }}""",
+)
+
+
+class GraphQLClient:
+    """Send precompiled queries, with their variables, through `fetch`.
+
+    With `persisted` set, only the query's hash is sent at first (the
+    automatic persisted query protocol), and the full document only if the
+    server asks for it. If the server turns out not to support that, it is
+    switched off again."""
+
+    def __init__(self, fetch, breaker, url=GRAPHQL_URL, persisted=False):
+        self.fetch = fetch
+        self.breaker = breaker
+        self.url = url
+        self.persisted = persisted
+
+    def post(self, payload):
+        with self.breaker:
+            response = self.fetch("POST", self.url, json=payload)
+
+            if not 200 <= response.status_code < 300:
+                raise RuntimeError(f"{response.status_code} from graphql server")
+
+        return response.json()
+
+    def execute(self, query, **variables):
+        payload = {"operationName": query.name, "variables": variables}
+        if self.persisted:
+            extensions = {"persistedQuery": {"version": 1, "sha256Hash": query.sha256}}
+            try:
+                result = self.post({**payload, "extensions": extensions})
+            except CircuitOpenError:
+                raise
+            except RuntimeError as ex:
+                logging.info(f"Persisted query failed ({ex}); sending it in full")
+                self.persisted = False
+            else:
+                errors = {error.get("message") for error in result.get("errors", [])}
+                if "PersistedQueryNotSupported" in errors:
+                    logging.info("Server doesn't support persisted queries")
+                    self.persisted = False
+                elif "PersistedQueryNotFound" not in errors:
+                    return result
+                payload["extensions"] = extensions
+
+        return self.post({**payload, "query": query.document})
@@ -0,0 +1,208 @@
+import argparse
+import csv
+from datetime import datetime, timezone
+import logging
+import os
+import struct
+from time import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+KINDS = ("donation", "total", "bonus", "announcement")
+
+# time (Unix seconds), kind (index into KINDS), amount, currency code.
+# Amounts are in minor units, except for announcements, where they are the
+# time taken to start playing in milliseconds.
+_record = struct.Struct("<dBq3s")
+
+
+def record_dtype():
+    return numpy.dtype(
+        [("time", "<f8"), ("kind", "u1"), ("amount", "<i8"), ("currency", "S3")]
+    )
+
+
+class HistoryWriter:
+    """Append events to a history file as fixed-width binary records, so that
+    the whole file can later be memory-mapped as a NumPy structured array and
+    queried without parsing. Writing needs only the standard library; the
+    queries in History need NumPy, and Parquet export needs pyarrow."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "ab")
+        # Don't build on a record cut short by a crash
+        self._file.truncate(self._file.tell() - self._file.tell() % _record.size)
+
+    def record(self, kind, amount, currency="", moment=None):
+        try:
+            self._file.write(
+                _record.pack(
+                    time() if moment is None else moment,
+                    KINDS.index(kind),
+                    int(amount or 0),
+                    (currency or "").encode("ascii", "replace")[:3],
+                )
+            )
+            self._file.flush()
+        except (OSError, ValueError) as ex:
+            logging.warning(f"Couldn't write to history {self.path}: {ex}")
+
+    def close(self):
+        self._file.close()
+
+
+def iter_records(path):
+    """Yield (time, kind, amount, currency) for each record, without NumPy."""
+
+    with open(path, "rb") as f:
+        data = f.read()
+    data = data[: len(data) - len(data) % _record.size]
+    for moment, kind, amount, currency in _record.iter_unpack(data):
+        yield moment, KINDS[kind], amount, currency.rstrip(b"\0").decode("ascii")
+
+
+def export_csv(path, out):
+    with open(out, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["time", "kind", "amount", "currency"])
+        for moment, kind, amount, currency in iter_records(path):
+            writer.writerow(
+                [
+                    datetime.fromtimestamp(moment, timezone.utc).isoformat(),
+                    kind,
+                    amount,
+                    currency,
+                ]
+            )
+
+
+class History:
+    """Read-only, memory-mapped view of a history file."""
+
+    def __init__(self, path):
+        if numpy is None:
+            raise RuntimeError(
+                "Analysing history needs NumPy; "
+                "install justgiving_totaliser[history] to get it"
+            )
+
+        dtype = record_dtype()
+        count = os.path.getsize(path) // dtype.itemsize
+        if count:
+            self.records = numpy.memmap(path, dtype=dtype, mode="r", shape=(count,))
+        else:
+            self.records = numpy.zeros(0, dtype=dtype)
+
+    def __len__(self):
+        return len(self.records)
+
+    def select(self, kind):
+        return self.records[self.records["kind"] == KINDS.index(kind)]
+
+    def per_minute(self, kind="donation"):
+        """Return the start of each minute from the first record of `kind` to
+        the last, and the sum of the amounts in each."""
+
+        records = self.select(kind)
+        if not len(records):
+            return numpy.zeros(0), numpy.zeros(0, dtype="i8")
+
+        start = numpy.floor(records["time"].min() / 60) * 60
+        minutes = ((records["time"] - start) // 60).astype("i8")
+        sums = numpy.bincount(minutes, weights=records["amount"]).astype("i8")
+        return start + 60 * numpy.arange(len(sums)), sums
+
+    def percentiles(self, kind="donation", percentiles=(50, 90, 95, 99)):
+        amounts = self.select(kind)["amount"]
+        if not len(amounts):
+            return {}
+        return dict(zip(percentiles, numpy.percentile(amounts, percentiles)))
+
+    def cumulative(self, kind="donation"):
+        """Return the time of each record of `kind`, and the running total of
+        their amounts."""
+
+        records = numpy.sort(self.select(kind), order="time")
+        return records["time"], numpy.cumsum(records["amount"])
+
+    def to_arrow(self):
+        if pyarrow is None:
+            raise RuntimeError(
+                "Exporting to Parquet needs pyarrow; "
+                "install justgiving_totaliser[history] to get it"
+            )
+
+        records = self.records
+        return pyarrow.table(
+            {
+                "time": pyarrow.array(
+                    (records["time"] * 1e6).astype("i8"), pyarrow.timestamp("us", "UTC")
+                ),
+                "kind": pyarrow.array(
+                    numpy.asarray(KINDS, dtype=object)[records["kind"]]
+                ).dictionary_encode(),
+                "amount": pyarrow.array(records["amount"]),
+                "currency": pyarrow.array(
+                    numpy.char.decode(records["currency"], "ascii")
+                ),
+            }
+        )
+
+    def export_parquet(self, out):
+        pyarrow.parquet.write_table(self.to_arrow(), out)
+
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="justgiving-totaliser history",
+        description="Analyse or export the history recorded during an event.",
+    )
+    parser.add_argument("path", help="history file to read")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("summary", help="count and percentiles of each kind")
+    per_minute = subparsers.add_parser("per-minute", help="sum of amounts per minute")
+    per_minute.add_argument("--kind", choices=KINDS, default="donation")
+    cumulative = subparsers.add_parser("cumulative", help="running total over time")
+    cumulative.add_argument("--kind", choices=KINDS, default="donation")
+    export = subparsers.add_parser("export", help="write to .csv or .parquet")
+    export.add_argument("out")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        if args.out.endswith(".parquet"):
+            History(args.path).export_parquet(args.out)
+        else:
+            export_csv(args.path, args.out)
+        return
+
+    history = History(args.path)
+    if args.command == "summary":
+        for kind in KINDS:
+            count = len(history.select(kind))
+            percentiles = ", ".join(
+                f"p{percentile}={value:g}"
+                for percentile, value in history.percentiles(kind).items()
+            )
+            print(f"{kind}: {count} {percentiles}")
+    elif args.command == "per-minute":
+        for minute, total in zip(*history.per_minute(args.kind)):
+            print(
+                f"{datetime.fromtimestamp(minute, timezone.utc):%Y-%m-%d %H:%M}Z,{total}"
+            )
+    elif args.command == "cumulative":
+        for moment, total in zip(*history.cumulative(args.kind)):
+            print(f"{datetime.fromtimestamp(moment, timezone.utc).isoformat()},{total}")
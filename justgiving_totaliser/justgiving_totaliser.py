@@ -1,39 +1,71 @@
-from datetime import timedelta
+from datetime import datetime, timedelta
 from decimal import Decimal
 from functools import partial
 import logging
+import os
 import sys
 
 import pkg_resources
 
-from PyQt5.QtCore import Qt, QEvent, QSettings, QThreadPool, QTimer
+from PyQt5.QtCore import Qt, QEvent, QStandardPaths, QThreadPool, QTimer
 from PyQt5.QtGui import QColor, QIcon
 from PyQt5.QtWidgets import (
     QAction,
     QApplication,
     QColorDialog,
     QDesktopWidget,
+    QFileDialog,
     QInputDialog,
     QMainWindow,
+    QMessageBox,
     QPushButton,
     QVBoxLayout,
     QWidget,
 )
 
+from .analytics import DonationAnalytics
 from .announcer import Announcement, Announcer
-from .scrape import DataGetter, fake_get_data, get_data
-from .settings import DEFAULT_FONT
+from .breaker import CircuitOpenError
+from .common import format_donor, known_currencies
+from .currency import RATES, MissingRate, RateTable, from_minor, load_rates, to_minor
+from .donors import DonorIndex, same_donation
+from .history import HistoryWriter
+from .metrics import MetricsServer, dropped_polls, ui_update_seconds
+from .profiles import load_profile, save_profile
+from .profiling import TRACER, EventLoopMonitor, traced
+from .scrape import (
+    CatchUpGetter,
+    DataGetter,
+    currency_codes,
+    fake_get_data,
+    get_data,
+    get_slug,
+    graphql_breaker,
+    graphql_client,
+    page_breaker,
+    page_resolver,
+    start_parse_process,
+    stop_parse_process,
+)
+from .settings import DEFAULT_FONT, CachedSettings
+from .thresholds import BonusTable
 from .types import Donor, Total
+from .watchdog import StallWatchdog
 
 from .widgets.about import AboutDialog
 from .widgets.bonuses import BonusDialog
 from .widgets.countdown import Countdown
 from .widgets.donorlist import DonorList
 from .widgets.latestdonor import LatestDonor
+from .widgets.leaderboard import Leaderboard
 from .widgets.marquee import Marquee
+from .widgets.metrics import MetricsPanel
+from .widgets.momentum import Momentum
 from .widgets.progressbar import ProgressBarWindow
 from .widgets.timer import StatusDisplayingTimer, TimerStatusDisplay
 
+MIN_ADAPTIVE_INTERVAL = 10_000
+
 
 class ShowButton(QPushButton):
     def __init__(self, caption, parent, target):
@@ -65,7 +97,19 @@ class JustGivingTotaliser(QMainWindow):
         self.donor_list = DonorList()
         self.marquee = Marquee()
         self.countdown = Countdown()
-        self.bonuses = []
+        self.momentum = Momentum()
+        self.leaderboard = Leaderboard()
+        self.leaderboard.top.value = self.donor_value
+        self.progress_bar.to_display = self.to_display_totals
+        self.momentum.to_display = self.to_display_totals
+        self.bonuses = BonusTable()
+        self.analytics = DonationAnalytics()
+        self.donor_index = DonorIndex()
+        self.polls_started = self.polls_applied = 0
+        self.history = None
+        self.page_currency = "GBP"
+        self.catching_up = False
+        self.window_shape = None
 
         self.layout = QVBoxLayout()
 
@@ -78,6 +122,8 @@ class JustGivingTotaliser(QMainWindow):
             (self.donor_list, "Donor list"),
             (self.marquee, "Donor marquee"),
             (self.countdown, "Countdown"),
+            (self.momentum, "Momentum"),
+            (self.leaderboard, "Top donors"),
         ]:
             button = ShowButton(caption, self, widget)
             self.layout.addWidget(button)
@@ -101,6 +147,9 @@ class JustGivingTotaliser(QMainWindow):
 
         self.init_colours()
         self.init_announcements()
+        self.init_metrics()
+        self.init_watchdog()
+        self.init_history()
 
     def init_announcements(self):
         self.stop_announcement_action = QAction("Stop announcement", self)
@@ -111,8 +160,13 @@ class JustGivingTotaliser(QMainWindow):
         self.stop_announcement_action.triggered.connect(self.stop_all_announcements)
         self.audio_menu.addAction(self.stop_announcement_action)
 
-        tts_enabled = self.settings.value("use_voice", True)
-        self.announcer = Announcer(tts=tts_enabled)
+        tts_enabled = self.settings.value("use_voice", True, type=bool)
+        self.announcer = Announcer(
+            tts=tts_enabled,
+            backlog_budget=float(
+                self.settings.value("announcements/backlog_budget", 60)
+            ),
+        )
 
         self.use_voice_action = QAction("Use TTS for announcements", self)
         self.use_voice_action.setCheckable(True)
@@ -126,6 +180,13 @@ class JustGivingTotaliser(QMainWindow):
         )
         self.audio_menu.addAction(self.use_voice_action)
 
+        self.backlog_budget_action = QAction("Set announcement backlog limit", self)
+        self.backlog_budget_action.setStatusTip(
+            "Set how far behind announcements can fall before donations are summarised"
+        )
+        self.backlog_budget_action.triggered.connect(self.set_backlog_budget)
+        self.audio_menu.addAction(self.backlog_budget_action)
+
         self.countdown.event_finish.connect(
             lambda: self.announcer.announce(
                 Announcement(
@@ -135,6 +196,101 @@ class JustGivingTotaliser(QMainWindow):
             )
         )
 
+    def init_metrics(self):
+        self.metrics_panel = MetricsPanel()
+        self.metrics_server = None
+
+        self.show_metrics_action = QAction("Show metrics", self)
+        self.show_metrics_action.setStatusTip(
+            "Show timings and counts from fetching and displaying data."
+        )
+        self.show_metrics_action.triggered.connect(self.metrics_panel.show)
+        self.help_sub_menu.addAction(self.show_metrics_action)
+
+        self.serve_metrics_action = QAction("Serve metrics", self)
+        self.serve_metrics_action.setStatusTip(
+            "Serve metrics for Prometheus at http://127.0.0.1:<port>/metrics"
+        )
+        self.serve_metrics_action.setCheckable(True)
+        self.serve_metrics_action.toggled.connect(self.serve_metrics)
+        self.help_sub_menu.addAction(self.serve_metrics_action)
+
+        self.serve_metrics_action.setChecked(
+            self.settings.value("metrics/serve", False, type=bool)
+        )
+
+    def serve_metrics(self, serve):
+        if self.metrics_server:
+            self.metrics_server.stop()
+            self.metrics_server = None
+
+        if serve:
+            port = self.settings.value("metrics/port", 9464, type=int)
+            try:
+                self.metrics_server = MetricsServer(port)
+            except OSError as ex:
+                logging.warning(f"Couldn't serve metrics on port {port}: {ex}")
+                self.serve_metrics_action.setChecked(False)
+                return
+            self.metrics_server.start()
+
+        self.settings.setValue("metrics/serve", serve)
+
+    def init_history(self):
+        self.announcer.started_playing.connect(
+            lambda latency: self.record_history("announcement", latency * 1000)
+        )
+        self.open_history()
+
+    def history_path(self):
+        try:
+            name = get_slug(self.url).replace("/", "_")
+        except (TypeError, ValueError):
+            name = "default"
+        directory = self.settings.value(
+            "history/directory",
+            os.path.join(
+                QStandardPaths.writableLocation(QStandardPaths.AppDataLocation),
+                "history",
+            ),
+        )
+        return os.path.join(directory, f"{name}.jghist")
+
+    def open_history(self):
+        """Start recording to the history file for the current page."""
+
+        if self.history is not None:
+            self.history.close()
+            self.history = None
+        if not self.settings.value("history/enabled", True, type=bool):
+            return
+
+        path = self.history_path()
+        try:
+            self.history = HistoryWriter(path)
+        except OSError as ex:
+            logging.warning(f"Couldn't open history file {path}: {ex}")
+        else:
+            logging.info(f"Recording history to {path}")
+
+    def record_history(self, kind, amount, currency=""):
+        if self.history is not None:
+            self.history.record(kind, amount, self.currency_code(currency))
+
+    def init_watchdog(self):
+        self.watchdog = StallWatchdog(
+            threshold=self.settings.value("watchdog/threshold", 0.5, type=float)
+        )
+        self.watchdog.stalled.connect(self.show_stall)
+        self.watchdog.start()
+
+    def show_stall(self, duration, stack):
+        now = datetime.now().strftime("%H:%M:%S")
+        self.timer_status_display.stalls = (
+            f"Window updates stalled {self.watchdog.count} time(s); "
+            f"last for {duration:.1f}s at {now}"
+        )
+
     def init_timers(self):
         self.thread_pool = QThreadPool()
 
@@ -145,13 +301,27 @@ class JustGivingTotaliser(QMainWindow):
         self.repaint_timer.timeout.connect(self.repaint_all)
         self.repaint_timer.start(60_000)
 
+    def window_sizes(self):
+        return [
+            (self.progress_bar, "bar", 500, 150),
+            (self.latest_donor, "latest", 500, 150),
+            (self.donor_list, "list", 250, 250),
+            (self.marquee, "marquee", 500, 150),
+            (self.countdown, "countdown", 250, 150),
+            (self.momentum, "momentum", 500, 100),
+            (self.leaderboard, "leaderboard", 250, 250),
+            (self, "mainWindow", 250, 250),
+        ]
+
     def init_settings(self):
-        self.settings = QSettings("h0m54r", "justgiving_totaliser")
+        self.settings = CachedSettings("h0m54r", "justgiving_totaliser")
+        for widget, key, *_ in self.window_sizes():
+            widget.settings = self.settings
+            widget.key = key
+
         self.url = self.settings.value("url", defaultValue=None)
-        self.default_target = self.settings.value("default_target", defaultValue=1000)
-        self.timer_interval = int(
-            self.settings.value("timer_interval", defaultValue=60_000)
-        )
+        self.apply_settings()
+
         if self.url:
             try:
                 self.start_update_data(synchronous=True)
@@ -160,35 +330,72 @@ class JustGivingTotaliser(QMainWindow):
             else:
                 self.pause(force_resume=True)
 
-        for widget, key, default_width, default_height in [
-            (self.progress_bar, "bar", 500, 150),
-            (self.latest_donor, "latest", 500, 150),
-            (self.donor_list, "list", 250, 250),
-            (self.marquee, "marquee", 500, 150),
-            (self.countdown, "countdown", 250, 150),
-            (self, "mainWindow", 250, 250),
-        ]:
-            widget.settings = self.settings
-            widget.key = key
+    def apply_settings(self):
+        """Bring the windows into line with the current settings."""
 
-            width = int(self.settings.value(f"{key}/width", default_width))
-            height = int(self.settings.value(f"{key}/height", default_height))
-            left = self.settings.value(f"{key}/left", None)
-            top = self.settings.value(f"{key}/top", None)
+        with self.settings.applying():
+            self.url = self.settings.value("url", defaultValue=None)
+            self.default_target = self.settings.value(
+                "default_target", defaultValue=1000
+            )
+            self.timer_interval = int(
+                self.settings.value("timer_interval", defaultValue=60_000)
+            )
+            self.poll_budget = float(self.settings.value("poll_budget", 15))
+            self.adaptive_polling = self.settings.value(
+                "adaptive_polling", False, type=bool
+            )
+            self.adaptive_polling_action.setChecked(self.adaptive_polling)
+            parse_process = self.settings.value(
+                "parsing/separate_process", False, type=bool
+            )
+            self.parse_process_action.setChecked(parse_process)
+            self.set_parse_process(parse_process, save=False)
+            self.display_currency = self.settings.value("currency/display", "")
+            include_gift_aid = self.settings.value("gift_aid/include", False, type=bool)
+            self.include_gift_aid_action.setChecked(include_gift_aid)
+            self.set_include_gift_aid(include_gift_aid, save=False)
+            graphql_client.persisted = self.settings.value(
+                "graphql/persisted_queries", False, type=bool
+            )
+            self.catch_up_budget = float(
+                self.settings.value("announcements/catch_up_budget", 30)
+            )
+            self.thread_pool.start(
+                partial(
+                    load_rates,
+                    self.settings.value("currency/rates_file", self.rates_path()),
+                    self.settings.value("currency/rates_url", "") or None,
+                    timedelta(
+                        hours=float(self.settings.value("currency/rates_max_age", 24))
+                    ),
+                )
+            )
 
-            widget.resize(width, height)
-            if left and top:
-                widget.move(int(left), int(top))
+            for widget, key, default_width, default_height in self.window_sizes():
+                width = int(self.settings.value(f"{key}/width", default_width))
+                height = int(self.settings.value(f"{key}/height", default_height))
+                left = self.settings.value(f"{key}/left", None)
+                top = self.settings.value(f"{key}/top", None)
 
-        self.show_hide_title_bars(self.settings.value("hide_title_bars", False))
-        self.marquee.speed = float(self.settings.value("marquee/speed", 50))
-        self.donor_list.num_donors = int(
-            self.settings.value("donor_list/num_donors", 10)
-        )
-        self.countdown.load_settings(self.settings)
+                widget.resize(width, height)
+                if left and top:
+                    widget.move(int(left), int(top))
+
+            self.show_hide_title_bars(
+                self.settings.value("hide_title_bars", False, type=bool)
+            )
+            self.marquee.speed = float(self.settings.value("marquee/speed", 50))
+            self.donor_list.num_donors = int(
+                self.settings.value("donor_list/num_donors", 10)
+            )
+            self.leaderboard.num_donors = int(
+                self.settings.value("leaderboard/num_donors", 5)
+            )
+            self.countdown.load_settings(self.settings)
 
-        self.bonuses = self.settings.value("bonuses", [])
-        self.compute_bonuses()
+            self.bonuses = BonusTable.from_settings(self.settings.value("bonuses", []))
+            self.compute_bonuses()
 
     def file_menu(self):
         """Create a file submenu with an Open File item that opens a file dialog."""
@@ -217,6 +424,26 @@ class JustGivingTotaliser(QMainWindow):
         self.refresh_time_action.setShortcut("CTRL+R")
         self.refresh_time_action.triggered.connect(self.set_refresh_time)
 
+        self.poll_budget_action = QAction("Set update time limit", self)
+        self.poll_budget_action.setStatusTip(
+            "Set how long an update may take before its results are discarded."
+        )
+        self.poll_budget_action.triggered.connect(self.set_poll_budget)
+
+        self.adaptive_polling_action = QAction("Update faster when busy", self)
+        self.adaptive_polling_action.setStatusTip(
+            "Shorten the refresh time while donations are coming in quickly."
+        )
+        self.adaptive_polling_action.setCheckable(True)
+        self.adaptive_polling_action.triggered.connect(self.set_adaptive_polling)
+
+        self.parse_process_action = QAction("Parse pages in a separate process", self)
+        self.parse_process_action.setStatusTip(
+            "Keep the overlays moving smoothly while each update is processed."
+        )
+        self.parse_process_action.setCheckable(True)
+        self.parse_process_action.triggered.connect(self.set_parse_process)
+
         self.marquee_speed_action = QAction("Set marquee speed", self)
         self.marquee_speed_action.setStatusTip(
             "Set the speed at which the marquee moves."
@@ -229,6 +456,31 @@ class JustGivingTotaliser(QMainWindow):
         self.num_donors_action.setShortcut("CTRL+N")
         self.num_donors_action.triggered.connect(self.set_num_donors)
 
+        self.num_top_donors_action = QAction("Set number of top donations", self)
+        self.num_top_donors_action.setStatusTip(
+            "Set the number of donations to show on the top donors leaderboard"
+        )
+        self.num_top_donors_action.triggered.connect(self.set_num_top_donors)
+
+        self.display_currency_action = QAction("Set display currency", self)
+        self.display_currency_action.setStatusTip(
+            "Convert totals to another currency, using the exchange rates loaded."
+        )
+        self.display_currency_action.triggered.connect(self.set_display_currency)
+
+        self.include_gift_aid_action = QAction("Include Gift Aid in amounts", self)
+        self.include_gift_aid_action.setStatusTip(
+            "Count Gift Aid in donation amounts, top donations and totals announced."
+        )
+        self.include_gift_aid_action.setCheckable(True)
+        self.include_gift_aid_action.triggered.connect(self.set_include_gift_aid)
+
+        self.load_rates_action = QAction("Load exchange rates", self)
+        self.load_rates_action.setStatusTip(
+            "Load a JSON file of exchange rates to convert between currencies."
+        )
+        self.load_rates_action.triggered.connect(self.load_rates_file)
+
         self.hide_title_bars_action = QAction("Hide title bars", self)
         self.hide_title_bars_action.setStatusTip(
             "Hide the title bars of the windows intended to be streamed"
@@ -248,6 +500,18 @@ class JustGivingTotaliser(QMainWindow):
             lambda: self.show_hide_title_bars(hide=False)
         )
 
+        self.save_profile_action = QAction("Save profile", self)
+        self.save_profile_action.setStatusTip(
+            "Save the whole configuration to a file, to load again later."
+        )
+        self.save_profile_action.triggered.connect(self.save_profile)
+
+        self.load_profile_action = QAction("Load profile", self)
+        self.load_profile_action.setStatusTip(
+            "Replace the whole configuration with one saved to a file."
+        )
+        self.load_profile_action.triggered.connect(self.load_profile)
+
         self.exit_action = QAction("Exit Application", self)
         self.exit_action.setStatusTip("Exit the application.")
         self.exit_action.setShortcut("CTRL+Q")
@@ -257,10 +521,19 @@ class JustGivingTotaliser(QMainWindow):
         self.file_sub_menu.addAction(self.set_default_target_action)
         self.file_sub_menu.addAction(self.pause_action)
         self.file_sub_menu.addAction(self.refresh_time_action)
+        self.file_sub_menu.addAction(self.poll_budget_action)
+        self.file_sub_menu.addAction(self.adaptive_polling_action)
+        self.file_sub_menu.addAction(self.parse_process_action)
         self.file_sub_menu.addAction(self.marquee_speed_action)
         self.file_sub_menu.addAction(self.num_donors_action)
+        self.file_sub_menu.addAction(self.num_top_donors_action)
+        self.file_sub_menu.addAction(self.display_currency_action)
+        self.file_sub_menu.addAction(self.include_gift_aid_action)
+        self.file_sub_menu.addAction(self.load_rates_action)
         self.file_sub_menu.addAction(self.hide_title_bars_action)
         self.file_sub_menu.addAction(self.show_title_bars_action)
+        self.file_sub_menu.addAction(self.save_profile_action)
+        self.file_sub_menu.addAction(self.load_profile_action)
         self.file_sub_menu.addAction(self.exit_action)
 
     def time_menu(self):
@@ -272,12 +545,8 @@ class JustGivingTotaliser(QMainWindow):
         self.bonuses_action.triggered.connect(self.set_bonuses)
         self.time_menu.addAction(self.bonuses_action)
 
-    def init_colours(self):
-        self.migrate_text_colour_settings()
-        self.colour_menu = self.menu_bar.addMenu("Colours")
-        self.colour_menu_items = []
-
-        for widget, attrname, text, default in [
+    def colour_settings(self):
+        return [
             (self.progress_bar, "bar_colour", "progress bar", QColor(Qt.green)),
             (
                 self.progress_bar,
@@ -295,7 +564,16 @@ class JustGivingTotaliser(QMainWindow):
             (self.donor_list, "text_colour", "donor list text", QColor(Qt.white)),
             (self.marquee, "text_colour", "marquee text", QColor(Qt.white)),
             (self.countdown, "text_colour", "countdown text", QColor(Qt.white)),
-        ]:
+            (self.momentum, "text_colour", "momentum text", QColor(Qt.white)),
+            (self.leaderboard, "text_colour", "top donors text", QColor(Qt.white)),
+        ]
+
+    def init_colours(self):
+        self.migrate_text_colour_settings()
+        self.colour_menu = self.menu_bar.addMenu("Colours")
+        self.colour_menu_items = []
+
+        for widget, attrname, text, _ in self.colour_settings():
 
             def set_colour(colour, widget, attrname, text):
                 colour = QColorDialog.getColor(
@@ -314,20 +592,26 @@ class JustGivingTotaliser(QMainWindow):
             self.colour_menu.addAction(action)
             self.colour_menu_items.append(action)
 
-            setattr(
-                widget,
-                attrname,
-                QColor(self.settings.value(f"{widget.key}/{attrname}", default)),
-            )
-
         background_colour_action = QAction("Set window background colour")
         background_colour_action.triggered.connect(self.set_background_colours)
-        self.set_background_colours(
-            self.settings.value("background_colour", QColor(Qt.magenta))
-        )
         self.colour_menu.addAction(background_colour_action)
         self.colour_menu_items.append(background_colour_action)
 
+        self.apply_colours()
+
+    def apply_colours(self):
+        with self.settings.applying():
+            for widget, attrname, _, default in self.colour_settings():
+                setattr(
+                    widget,
+                    attrname,
+                    QColor(self.settings.value(f"{widget.key}/{attrname}", default)),
+                )
+
+            self.set_background_colours(
+                self.settings.value("background_colour", QColor(Qt.magenta))
+            )
+
     def migrate_text_colour_settings(self):
         if (
             text_colour := self.settings.value("bar/text_colour", None)
@@ -337,12 +621,11 @@ class JustGivingTotaliser(QMainWindow):
 
     def audio_menu(self):
         test_donations = [
-            Donor("Test donor", "Testing, one two, three.", "NOTHING!"),
+            Donor("Test donor", "Testing, one two, three.", amount_text="NOTHING!"),
             Donor(
                 "Another test donor",
                 "This is a test of the Emergency Broadcast System. "
                 "This is only a test.",
-                None,
             ),
         ]
 
@@ -393,6 +676,18 @@ class JustGivingTotaliser(QMainWindow):
         if accept:
             self.announcer.play_last(num_announcements)
 
+    def set_backlog_budget(self):
+        budget, accept = QInputDialog.getDouble(
+            self,
+            "Enter time",
+            "Enter the longest backlog of announcements to allow, in seconds:",
+            self.announcer.backlog_budget,
+            0,
+        )
+        if accept:
+            self.announcer.backlog_budget = budget
+            self.settings.setValue("announcements/backlog_budget", budget)
+
     def stop_all_announcements(self):
         self.announcer.stop()
 
@@ -433,9 +728,64 @@ class JustGivingTotaliser(QMainWindow):
 
         self.fake_justgiving_action.triggered.connect(patch_get_data)
 
+        self.event_loop_monitor = EventLoopMonitor()
+
+        self.record_trace_action = QAction("Record trace", self)
+        self.record_trace_action.setStatusTip(
+            "Record timings of updates, painting and event loop stalls, "
+            "and profile the GUI thread."
+        )
+        self.record_trace_action.setCheckable(True)
+        self.record_trace_action.toggled.connect(self.record_trace)
+
+        self.save_trace_action = QAction("Save trace", self)
+        self.save_trace_action.setStatusTip(
+            "Save recorded timings in Chrome trace format, for Perfetto."
+        )
+        self.save_trace_action.triggered.connect(self.save_trace)
+
+        self.save_profiler_stats_action = QAction("Save profiler stats", self)
+        self.save_profiler_stats_action.setStatusTip(
+            "Save the GUI thread profile in pstats format."
+        )
+        self.save_profiler_stats_action.triggered.connect(self.save_profiler_stats)
+
         self.debug_menu.addAction(self.test_audio_queue_action)
         self.debug_menu.addAction(self.add_500_donation_action)
         self.debug_menu.addAction(self.fake_justgiving_action)
+        self.debug_menu.addAction(self.record_trace_action)
+        self.debug_menu.addAction(self.save_trace_action)
+        self.debug_menu.addAction(self.save_profiler_stats_action)
+
+    def record_trace(self, record):
+        if record:
+            TRACER.start(profile=True)
+            self.event_loop_monitor.start()
+        else:
+            self.event_loop_monitor.stop()
+            TRACER.stop()
+
+    def save_trace(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Save trace", "trace.json", "Traces (*.json)"
+        )
+        if not path:
+            return
+        try:
+            TRACER.save_trace(path)
+        except OSError as ex:
+            QMessageBox.warning(self, "Can't save trace", str(ex))
+
+    def save_profiler_stats(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Save profiler stats", "profile.pstats", "Profiles (*.pstats)"
+        )
+        if not path:
+            return
+        try:
+            TRACER.save_stats(path)
+        except (OSError, RuntimeError) as ex:
+            QMessageBox.warning(self, "Can't save profiler stats", str(ex))
 
     def set_background_colours(self, colour=None):
         if not colour:
@@ -456,6 +806,8 @@ class JustGivingTotaliser(QMainWindow):
                 self.latest_donor,
                 self.donor_list,
                 self.countdown,
+                self.momentum,
+                self.leaderboard,
             ):
                 window.background_colour = colour
 
@@ -477,12 +829,70 @@ class JustGivingTotaliser(QMainWindow):
 
         if accept:
             self.url = url
+            self.forget_page()
             self.timer.status_display.status = "Connecting"
             self.timer.status_display.last_check = "Waiting to connect..."
             self.settings.setValue("url", url)
             self.pause(force_resume=True)
             self.start_update_data(synchronous=True)
 
+    def forget_page(self):
+        """Start afresh with a new page, rather than carrying over what was
+        learnt about the old one."""
+
+        page_breaker.reset()
+        graphql_breaker.reset()
+        page_resolver.clear()
+        self.analytics.reset()
+        self.leaderboard.reset()
+        self.open_history()
+
+    def save_profile(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Save profile", "", "Profiles (*.json)"
+        )
+        if not path:
+            return
+        try:
+            save_profile(path, self.settings.all_values())
+        except OSError as ex:
+            QMessageBox.warning(self, "Can't save profile", str(ex))
+
+    def load_profile(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Load profile", "", "Profiles (*.json)"
+        )
+        if not path:
+            return
+
+        try:
+            name, values = load_profile(path)
+        except (OSError, ValueError, KeyError, TypeError) as ex:
+            QMessageBox.warning(self, "Can't load profile", str(ex))
+            return
+
+        old_url = self.url
+        self.settings.replace(values)
+        self.apply_settings()
+        self.apply_colours()
+        with self.settings.applying():
+            self.use_voice_action.setChecked(
+                self.settings.value("use_voice", True, type=bool)
+            )
+            self.announcer.backlog_budget = float(
+                self.settings.value("announcements/backlog_budget", 60)
+            )
+        logging.info(f"Loaded profile {name}")
+
+        if self.url != old_url:
+            self.progress_bar.totals = None
+            self.donor_index = DonorIndex()
+            self.forget_page()
+        if self.url:
+            self.pause(force_resume=True)
+        else:
+            self.timer.stop()
+
     def set_default_target(self):
         target_text, accept = QInputDialog.getText(
             self,
@@ -512,6 +922,44 @@ class JustGivingTotaliser(QMainWindow):
                 self.timer.stop()
                 self.timer.start(self.timer_interval)
 
+    def set_poll_budget(self):
+        poll_budget, accept = QInputDialog.getDouble(
+            self,
+            "Enter time limit",
+            "Enter the longest an update may take, in seconds.\n"
+            "(Never more than the refresh time.)",
+            self.poll_budget,
+        )
+
+        if accept:
+            self.poll_budget = poll_budget
+            self.settings.setValue("poll_budget", poll_budget)
+
+    def set_adaptive_polling(self, checked):
+        self.adaptive_polling = checked
+        self.settings.setValue("adaptive_polling", checked)
+        self.adapt_polling()
+
+    def set_parse_process(self, checked, save=True):
+        if checked:
+            start_parse_process()
+        else:
+            stop_parse_process()
+        if save:
+            self.settings.setValue("parsing/separate_process", checked)
+
+    def adapt_polling(self):
+        interval = self.timer_interval
+        if self.adaptive_polling:
+            interval = int(
+                self.analytics.suggested_interval(
+                    self.timer_interval, min(MIN_ADAPTIVE_INTERVAL, self.timer_interval)
+                )
+            )
+        if self.timer.isActive() and self.timer.interval() != interval:
+            logging.debug(f"Polling every {interval}ms")
+            self.timer.setInterval(interval)
+
     def set_marquee_speed(self):
         marquee_speed, accept = QInputDialog.getDouble(
             self,
@@ -536,57 +984,194 @@ class JustGivingTotaliser(QMainWindow):
             self.donor_list.num_donors = num_donors
             self.settings.setValue("donor_list/num_donors", num_donors)
 
+    def set_num_top_donors(self):
+        num_donors, accept = QInputDialog.getInt(
+            self,
+            "Enter number of top donors",
+            "Enter the number of largest donations to show on the leaderboard",
+            self.leaderboard.num_donors,
+        )
+
+        if accept:
+            self.leaderboard.num_donors = num_donors
+            self.settings.setValue("leaderboard/num_donors", num_donors)
+
+    def set_display_currency(self):
+        code, accept = QInputDialog.getText(
+            self,
+            "Enter currency",
+            "Enter the ISO code of the currency to show totals in, "
+            "or leave blank to use the page's own:",
+            text=self.display_currency,
+        )
+
+        if accept:
+            self.display_currency = code.strip().upper()
+            self.settings.setValue("currency/display", self.display_currency)
+            self.rerank_leaderboard()
+            self.progress_bar.refresh()
+            self.start_update_data()
+
+    def set_include_gift_aid(self, checked, save=True):
+        self.include_gift_aid = checked
+        self.donor_list.include_gift_aid = checked
+        self.leaderboard.include_gift_aid = checked
+        self.rerank_leaderboard()
+        if save:
+            self.settings.setValue("gift_aid/include", checked)
+
+    def rerank_leaderboard(self):
+        """Rank the top donations again, once the amounts they are ranked by
+        have changed."""
+
+        top_donors = self.leaderboard.top.donors
+        self.leaderboard.reset()
+        self.leaderboard.add_donors(top_donors)
+
+    def rates_path(self):
+        return os.path.join(
+            QStandardPaths.writableLocation(QStandardPaths.AppDataLocation),
+            "rates.json",
+        )
+
+    def load_rates_file(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Load exchange rates", "", "Exchange rates (*.json)"
+        )
+        if path:
+            try:
+                RATES.update(RateTable.from_file(path))
+            except (OSError, ValueError, KeyError) as ex:
+                QMessageBox.warning(self, "Can't load exchange rates", str(ex))
+                return
+            RATES.save(self.rates_path())
+            self.settings.setValue("currency/rates_file", self.rates_path())
+            self.rerank_leaderboard()
+            self.progress_bar.refresh()
+            self.start_update_data()
+
+    def currency_code(self, currency):
+        return currency_codes.get(currency, (currency or "").strip())
+
+    def to_display_totals(self, totals):
+        """Convert totals in the page's currency to the display currency, for
+        showing them; everything else works in the page's currency."""
+
+        raised, target, currency = totals
+        code = self.currency_code(currency)
+        if not self.display_currency or self.display_currency == code:
+            return totals
+
+        try:
+            return Total(
+                RATES.convert_major(raised, code, self.display_currency),
+                RATES.convert_major(target, code, self.display_currency),
+                known_currencies.get(
+                    self.display_currency, f"{self.display_currency} "
+                ),
+            )
+        except MissingRate as ex:
+            logging.warning(f"Showing totals in {code}: {ex}")
+            return totals
+
+    def donor_value(self, donor):
+        """Return the donor's amount in minor units of the page's currency, or
+        of their own currency if it can't be converted."""
+
+        code = self.page_currency
+        amount = donor.donation_amount.total(self.include_gift_aid)
+        try:
+            return RATES.convert(amount, donor.currency or code, code)
+        except MissingRate:
+            return amount
+
     def set_bonuses(self):
-        current_bonuses = self.settings.value("bonuses", [])
         bonuses_dialog = BonusDialog()
-        bonuses_dialog.bonuses = current_bonuses
+        bonuses_dialog.bonuses = list(self.bonuses)
         if bonuses_dialog.exec_():
-            self.bonuses = bonuses_dialog.bonuses
-            self.settings.setValue("bonuses", self.bonuses)
+            self.bonuses = BonusTable(bonuses_dialog.bonuses)
+            self.settings.setValue("bonuses", self.bonuses.to_settings())
             self.compute_bonuses()
 
     def compute_bonuses(self):
-        achieved_bonuses = []
         if self.progress_bar.totals:
             current_total, *_ = self.progress_bar.totals
-            for threshold, bonus in self.bonuses:
-                if current_total > threshold:
-                    achieved_bonuses.append(timedelta(hours=bonus))
-
-            self.countdown.bonus_time = achieved_bonuses
+            self.countdown.bonus_time = timedelta(
+                hours=self.bonuses.bonus_hours(current_total)
+            )
         else:
             current_total = 0
-            self.countdown.bonus_time = []
+            self.countdown.bonus_time = timedelta()
 
-        remaining_thresholds = [
-            threshold for threshold, _ in self.bonuses if threshold > current_total
-        ]
-        if remaining_thresholds:
-            logging.debug(f"Setting threshold to {min(remaining_thresholds)}")
-            self.progress_bar.next_threshold = min(remaining_thresholds)
+        next_threshold = self.bonuses.next_threshold(current_total)
+        if next_threshold is not None:
+            logging.debug(f"Setting threshold to {next_threshold}")
         else:
             logging.debug("No thresholds available...")
-            self.progress_bar.next_threshold = None
+        self.progress_bar.next_threshold = next_threshold
         self.progress_bar.update()
 
     def new_donors(self, donors):
-        if not self.donors:
-            return None
+        return self.donor_index.update(donors)
+
+    def count_donations(self, donors):
+        """Add new donations, newest first, to the leaderboard, momentum and
+        history."""
 
-        if len(donors) < len(self.donors):
-            # If the number of donations goes down, something has gone wrong
-            return None
+        self.analytics.add_donations(
+            [
+                from_minor(self.page_currency, self.donor_value(donor) or 0)
+                for donor in donors
+            ]
+        )
+        self.leaderboard.add_donors(donors)
+        for donor in reversed(donors):
+            self.record_history("donation", donor.amount, donor.currency)
 
-        if self.donors[0] not in donors:
-            # List has completely changed; probably something has gone wrong
-            return None
+    def start_catch_up(self, seen, window):
+        if self.catching_up:
+            return
+        self.catching_up = True
+        logging.info("Lost track of donations; catching up")
 
-        new_donors = []
-        for donor in donors:
-            if donor not in self.donors:
-                new_donors.append(donor)
-            else:
-                return new_donors
+        catch_up = CatchUpGetter(self.url, seen)
+        catch_up.signals.finished.connect(
+            lambda result: self.complete_catch_up(result, window)
+        )
+        self.thread_pool.start(catch_up)
+
+    def complete_catch_up(self, result, window):
+        """Thank everyone who donated while we weren't watching, in one
+        announcement trimmed to the catch-up time budget."""
+
+        self.catching_up = False
+        missed, complete = result
+        if isinstance(missed, Exception):
+            # Better to thank some twice than to miss anyone out
+            missed, complete = window, False
+
+        # Later donations than the window will be picked up by the next poll
+        for index, donor in enumerate(missed):
+            if window and same_donation(donor, window[0]):
+                missed = missed[index:]
+                break
+
+        if not missed:
+            return
+
+        for donor in reversed(missed):
+            logging.info(f"Catching up on {format_donor(donor)}")
+        self.count_donations(missed)
+
+        count = len(missed)
+        announcement = Announcement.from_donations(
+            missed,
+            intro=f"While we were away, we had {'' if complete else 'at least '}"
+            f"{count} {'donation' if count == 1 else 'donations'}",
+            include_gift_aid=self.include_gift_aid,
+        )
+        announcement.shorten(announcement.estimated_duration() - self.catch_up_budget)
+        self.announcer.announce(announcement)
 
     def show_hide_title_bars(self, hide):
         for window in (
@@ -594,6 +1179,8 @@ class JustGivingTotaliser(QMainWindow):
             self.latest_donor,
             self.donor_list,
             self.marquee,
+            self.momentum,
+            self.leaderboard,
         ):
             visible = window.isVisible()
             window.title_bar_hidden = hide
@@ -621,9 +1208,13 @@ class JustGivingTotaliser(QMainWindow):
         if old_total is None:
             return
 
-        new_bonuses = [
-            bonus for bonus in self.bonuses if old_total < bonus.threshold <= new_total
-        ]
+        new_bonuses = self.bonuses.crossed(old_total, new_total)
+        for bonus in new_bonuses:
+            self.record_history(
+                "bonus",
+                to_minor(self.currency_code(currency), bonus.threshold),
+                currency,
+            )
 
         message = ""
         if len(new_bonuses) == 1:
@@ -634,11 +1225,15 @@ class JustGivingTotaliser(QMainWindow):
             message += f"And that takes us over the next {len(new_bonuses)} bonus thresholds, adding an extra {self.format_bonus(total_bonus)} in all! Woo! "
 
         if old_total < target <= new_total:
-            message += f"And that {'also ' if message else ''} takes us past our {currency}{target} target! Well done everyone!"
+            _, shown_target, shown_currency = self.to_display_totals(
+                Total(new_total, target, currency)
+            )
+            message += f"And that {'also ' if message else ''} takes us past our {shown_currency}{shown_target} target! Well done everyone!"
 
         if message:
             self.announcer.announce(Announcement(message=message, fanfare="bonus"))
 
+    @traced("start_update_data")
     def start_update_data(self, synchronous=False, reraise=False):
         if synchronous:
             return self.complete_update_data(
@@ -648,43 +1243,102 @@ class JustGivingTotaliser(QMainWindow):
         if not self.url:
             return
 
-        data_getter = DataGetter(self.url, len(self.donor_list.donor_widgets))
+        self.polls_started += 1
+        poll = self.polls_started
+        data_getter = DataGetter(
+            self.url,
+            len(self.donor_list.donor_widgets),
+            budget=min(self.poll_budget, self.timer_interval / 1000),
+        )
         data_getter.signals.finished.connect(
-            lambda new_data: self.complete_update_data(reraise, new_data)
+            lambda new_data: self.complete_update_data(reraise, new_data, poll)
         )
         self.thread_pool.start(data_getter)
 
-    def complete_update_data(self, reraise=False, new_data=None):
+    @traced("complete_update_data")
+    def complete_update_data(self, reraise=False, new_data=None, poll=None):
         logging.debug("Entered complete_update_data")
 
+        if poll is not None:
+            if poll < self.polls_applied:
+                logging.debug(f"Dropping poll {poll}; {self.polls_applied} is newer")
+                dropped_polls.inc()
+                return
+            self.polls_applied = poll
+
         if self.url and new_data is not None:
             new_totals, donors = new_data
             if isinstance(new_totals, Exception):
                 logging.debug("Hit an error: new_totals.")
-                self.timer.update_failedcheck(verb="checked")
+                self.timer.update_failedcheck(
+                    verb="checked",
+                    backing_off=isinstance(new_totals, CircuitOpenError),
+                )
                 if reraise:
                     logging.debug("Raising this")
                     raise new_totals
                 return
 
-            old_total, *_ = self.progress_bar.totals or (None, None)
-
-            new_total, target, currency = new_totals or (0, 0, "£")
-            if target is None:
-                target = self.default_target
-                new_totals = Total(new_total, target, currency)
-
-            self.progress_bar.totals = new_totals
-
-            self.check_threshold_crossings(old_total, new_total, target, currency)
-            self.compute_bonuses()
-            if new_donors := self.new_donors(donors):
-                self.announcer.announce(Announcement.from_donations(new_donors))
-            self.donors = donors
-            if donors:
-                self.latest_donor.donor = donors[0]
-            self.donor_list.donors = donors[:]
-            self.marquee.donors = donors[:]
+            with ui_update_seconds.time():
+                old_total, *_ = self.progress_bar.totals or (None, None)
+
+                new_total, target, currency = new_totals or (0, 0, "£")
+                if new_totals:
+                    self.page_currency = self.currency_code(currency)
+                if target is None:
+                    target = self.default_target
+                    new_totals = Total(new_total, target, currency)
+
+                self.progress_bar.totals = new_totals
+
+                self.check_threshold_crossings(old_total, new_total, target, currency)
+                self.compute_bonuses()
+                self.analytics.add_total(new_total)
+                if new_total != old_total:
+                    self.record_history(
+                        "total",
+                        to_minor(self.currency_code(currency), new_total),
+                        currency,
+                    )
+                old_donors = self.donor_index.donors
+                new_donors = self.new_donors(donors)
+                # How many donors were asked for, and whether they came with
+                # ids; if either changes, the windows won't line up anyway
+                window_shape = (
+                    len(self.donor_list.donor_widgets),
+                    bool(donors) and all(donor.id is not None for donor in donors),
+                )
+                same_shape = window_shape == self.window_shape
+                self.window_shape = window_shape
+                if new_donors:
+                    self.announcer.announce(
+                        Announcement.from_donations(
+                            new_donors, include_gift_aid=self.include_gift_aid
+                        )
+                    )
+                    self.count_donations(new_donors)
+                elif new_donors is None and old_donors and same_shape:
+                    # There's a gap since the last window, so go back and
+                    # find what fell into it
+                    self.start_catch_up(old_donors, self.donor_index.donors)
+                elif new_donors is None:
+                    # First time round, or the window has changed; can't tell
+                    # which of these are new, so start again from this window
+                    # and only skip those already on the leaderboard
+                    self.leaderboard.add_donors(donors, check_duplicates=True)
+                self.momentum.show_analytics(
+                    self.analytics,
+                    currency,
+                    self.progress_bar.next_threshold,
+                    target,
+                )
+                self.adapt_polling()
+                donors = self.donor_index.donors
+                self.donors = donors
+                if donors:
+                    self.latest_donor.donor = donors[0]
+                self.donor_list.donors = donors[:]
+                self.marquee.donors = donors[:]
 
         self.update()
         self.progress_bar.update()
@@ -715,12 +1369,20 @@ class JustGivingTotaliser(QMainWindow):
         self.settings.setValue(f"{self.key}/top", self.pos().y())
 
         QApplication.closeAllWindows()
+        self.watchdog.stop()
+        stop_parse_process()
+        if self.history is not None:
+            self.history.close()
+        self.settings.flush()
         event.accept()
 
 
 def main(debug):
     application = QApplication(sys.argv)
+    application.setOrganizationName("h0m54r")
+    application.setApplicationName("justgiving_totaliser")
     window = JustGivingTotaliser(debug=debug)
+    application.aboutToQuit.connect(window.settings.flush)
     desktop = QDesktopWidget().availableGeometry()
     width = (desktop.width() - window.width()) // 2
     height = (desktop.height() - window.height()) // 2
@@ -0,0 +1,234 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging
+import threading
+from time import perf_counter
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _escape(text, quotes=True):
+    text = str(text).replace("\\", "\\\\").replace("\n", "\\n")
+    return text.replace('"', '\\"') if quotes else text
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, description, lock):
+        self.name = name
+        self.description = description
+        self._lock = lock
+        self._values = {}
+
+    @staticmethod
+    def _key(labels):
+        return tuple(sorted(labels.items()))
+
+    def samples(self):
+        with self._lock:
+            return [
+                (self.name, labels, value) for labels, value in self._values.items()
+            ]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, description, lock, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, description, lock)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            if key not in self._values:
+                self._values[key] = [[0] * (len(self.buckets) + 1), 0, 0]
+            counts, _, _ = entry = self._values[key]
+            counts[bisect_left(self.buckets, value)] += 1
+            entry[1] += 1
+            entry[2] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start, **labels)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for labels, (counts, count, total) in self._values.items():
+                cumulative = 0
+                for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                    cumulative += bucket_count
+                    samples.append(
+                        (f"{self.name}_bucket", (*labels, ("le", bound)), cumulative)
+                    )
+                samples.append((f"{self.name}_count", labels, count))
+                samples.append((f"{self.name}_sum", labels, total))
+        return samples
+
+    def summary(self):
+        """Return the count and mean of each labelled series."""
+
+        with self._lock:
+            return {
+                labels: (count, total / count if count else 0)
+                for labels, (_, count, total) in self._values.items()
+            }
+
+
+class Registry:
+    def __init__(self, prefix="justgiving_totaliser"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get(self, cls, name, description, **kwargs):
+        name = f"{self.prefix}_{name}"
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, description, threading.Lock(), **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name, description=""):
+        return self._get(Counter, name, description)
+
+    def gauge(self, name, description=""):
+        return self._get(Gauge, name, description)
+
+    def histogram(self, name, description="", buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, description, buckets=buckets)
+
+    def metrics(self):
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render_prometheus(self):
+        lines = []
+        for metric in self.metrics():
+            lines.append(
+                f"# HELP {metric.name} {_escape(metric.description, quotes=False)}"
+            )
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def render_text(self):
+        """Return a short human-readable summary, for the debug panel."""
+
+        lines = []
+        for metric in self.metrics():
+            short_name = metric.name[len(self.prefix) + 1 :]
+            if isinstance(metric, Histogram):
+                for labels, (count, mean) in metric.summary().items():
+                    lines.append(
+                        f"{short_name}{_format_labels(labels)}: "
+                        f"{count} observed, mean {mean * 1000:.1f}ms"
+                    )
+            else:
+                for _, labels, value in metric.samples():
+                    lines.append(f"{short_name}{_format_labels(labels)}: {value}")
+        return "\n".join(sorted(lines))
+
+
+METRICS = Registry()
+
+fetch_seconds = METRICS.histogram(
+    "fetch_seconds", "Time taken by HTTP requests, by host"
+)
+fetch_bytes = METRICS.counter("fetch_bytes_total", "Bytes downloaded, by host")
+fetch_errors = METRICS.counter("fetch_errors_total", "Failed HTTP requests, by host")
+parse_seconds = METRICS.histogram("parse_seconds", "Time taken to parse, by getter")
+getter_results = METRICS.counter(
+    "getter_results_total", "Outcomes of each totals getter, by getter and result"
+)
+ui_update_seconds = METRICS.histogram(
+    "ui_update_seconds", "Time taken to update the windows after a poll"
+)
+announcement_queue_depth = METRICS.gauge(
+    "announcement_queue_depth", "Announcements waiting to be played"
+)
+announcement_latency_seconds = METRICS.histogram(
+    "announcement_latency_seconds", "Time from starting an announcement to audio"
+)
+hedged_requests = METRICS.counter(
+    "hedged_requests_total", "Backup requests sent because the first was slow"
+)
+dropped_polls = METRICS.counter(
+    "dropped_polls_total", "Poll results discarded for arriving too late"
+)
+gui_stalls = METRICS.counter(
+    "gui_stalls_total", "Times the GUI event loop stopped responding"
+)
+gui_stall_seconds = METRICS.histogram(
+    "gui_stall_seconds", "How long the GUI event loop stopped responding for"
+)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = METRICS
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+
+        body = self.registry.render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug("Metrics request: " + format % args)
+
+
+class MetricsServer:
+    """Serve metrics in Prometheus text format at http://127.0.0.1:port/metrics."""
+
+    def __init__(self, port, registry=METRICS):
+        handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def start(self):
+        self.thread.start()
+        logging.info(f"Serving metrics on port {self.port}")
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
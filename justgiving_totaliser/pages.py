@@ -0,0 +1,103 @@
+from collections import namedtuple
+from functools import lru_cache
+import logging
+import threading
+from time import monotonic
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+
+Page = namedtuple("Page", ["url", "slug", "type"])
+
+# GraphQL page type for the first part of the path
+PAGE_TYPES = {
+    "page": "ONE_PAGE",
+    "fundraising": "ONE_PAGE",
+    "team": "TEAM",
+    "crowdfunding": "CROWDFUNDING",
+}
+
+
+def _split(url):
+    if "://" not in url:
+        url = f"https://{url}"
+    return urlsplit(url.strip())
+
+
+def _on_justgiving(url):
+    host = (_split(url).hostname or "").lower()
+    return host == "justgiving.com" or host.endswith(".justgiving.com")
+
+
+@lru_cache(maxsize=64)
+def canonical_page(url):
+    """Work out the canonical form of a JustGiving page URL, its slug and its
+    page type, without going to the network."""
+
+    if not _on_justgiving(url):
+        raise ValueError("URL is not on justgiving.com, giving up")
+
+    parts = _split(url)
+    slug = parts.path.strip("/")
+    page_type = PAGE_TYPES.get(slug.split("/", 1)[0], "ONE_PAGE")
+    canonical = urlunsplit(("https", "www.justgiving.com", f"/{slug}", "", ""))
+    return Page(canonical, slug, page_type)
+
+
+class PageResolver:
+    """Resolve page URLs to where they finally redirect to, and remember the
+    answer for `ttl` seconds, so that short links and old forms of URL only
+    cost an extra request once rather than on every poll."""
+
+    def __init__(self, fetch, ttl=3600, retry_ttl=60):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.retry_ttl = retry_ttl
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, url):
+        with self._lock:
+            cached = self._cache.get(url)
+        if cached and cached[1] > monotonic():
+            return cached[0]
+
+        try:
+            page, ttl = self._resolve(url)
+        except requests.exceptions.RequestException as ex:
+            logging.debug(f"Couldn't resolve {url}: {ex!r}")
+            # Stick with the last good answer, or failing that take a
+            # JustGiving URL as it stands; a short link elsewhere can't be
+            # guessed at, so let the caller see why it failed
+            if cached:
+                page = cached[0]
+            elif _on_justgiving(url):
+                page = canonical_page(url)
+            else:
+                raise
+            ttl = self.retry_ttl
+
+        with self._lock:
+            self._cache[url] = page, monotonic() + ttl
+        return page
+
+    def _resolve(self, url):
+        # Follow the URL as given, since short links live on other hosts; only
+        # where it ends up has to be a JustGiving page
+        address = url.strip()
+        if "://" not in address:
+            address = f"https://{address}"
+        response = self.fetch("HEAD", address, allow_redirects=True, hedge=False)
+        if not 200 <= response.status_code < 400:
+            raise requests.exceptions.HTTPError(
+                f"{response.status_code} resolving {url}", response=response
+            )
+
+        page = canonical_page(response.url)
+        if page.url != address:
+            logging.info(f"{url} redirects to {page.url}")
+        return page, self.ttl
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+import json
+import logging
+import os
+import pathlib
+import tempfile
+
+from PyQt5.QtGui import QColor
+
+PROFILE_VERSION = 1
+
+
+def encode_value(value):
+    if isinstance(value, QColor):
+        return {"type": "colour", "value": value.name(QColor.HexArgb)}
+    if isinstance(value, timedelta):
+        return {"type": "timedelta", "value": value.total_seconds()}
+    if isinstance(value, datetime):
+        return {"type": "datetime", "value": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"type": "decimal", "value": str(value)}
+    if isinstance(value, (list, tuple)):
+        return [encode_value(item) for item in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    raise ValueError(f"Don't know how to save {value!r} in a profile")
+
+
+def decode_value(value):
+    if isinstance(value, list):
+        return [decode_value(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+
+    kind = value.get("type")
+    if kind == "colour":
+        return QColor(value["value"])
+    if kind == "timedelta":
+        return timedelta(seconds=value["value"])
+    if kind == "datetime":
+        return datetime.fromisoformat(value["value"])
+    if kind == "decimal":
+        return Decimal(value["value"])
+    raise ValueError(f"Unknown value type {kind} in profile")
+
+
+def save_profile(path, values, name=None):
+    """Write all of the settings in `values` to a JSON profile at `path`.
+
+    The file is written alongside and then moved into place, so an existing
+    profile is never left half-written."""
+
+    path = pathlib.Path(path)
+    settings = {}
+    for key, value in sorted(values.items()):
+        try:
+            settings[key] = encode_value(value)
+        except ValueError as ex:
+            logging.warning(f"Leaving {key} out of profile: {ex}")
+
+    profile = {
+        "name": name or path.stem,
+        "version": PROFILE_VERSION,
+        "settings": settings,
+    }
+
+    with tempfile.NamedTemporaryFile(
+        "w", dir=path.parent, suffix=".tmp", delete=False, encoding="utf-8"
+    ) as f:
+        json.dump(profile, f, indent=2, ensure_ascii=False)
+    os.replace(f.name, path)
+
+
+def load_profile(path):
+    """Return the name and settings stored in the profile at `path`."""
+
+    with open(path, encoding="utf-8") as f:
+        profile = json.load(f)
+
+    if not isinstance(profile, dict) or "settings" not in profile:
+        raise ValueError(f"{path} is not a profile")
+    version = profile.get("version", PROFILE_VERSION)
+    if not isinstance(version, int):
+        raise ValueError(f"{path} has an unreadable version {version!r}")
+    if version > PROFILE_VERSION:
+        raise ValueError(f"{path} was saved by a newer version of the totaliser")
+
+    try:
+        settings = {
+            key: decode_value(value) for key, value in profile["settings"].items()
+        }
+    except (AttributeError, KeyError, TypeError) as ex:
+        raise ValueError(f"{path} has a malformed setting: {ex!r}") from ex
+    return profile.get("name", pathlib.Path(path).stem), settings
@@ -0,0 +1,162 @@
+from collections import deque
+from contextlib import contextmanager
+import cProfile
+from functools import wraps
+import json
+import logging
+import os
+import threading
+from time import perf_counter
+
+from PyQt5.QtCore import QObject, QTimer
+
+
+class Tracer:
+    """Record timing spans while enabled, to save as a Chrome/Perfetto trace.
+
+    Spans cost a single attribute check while tracing is off, so they can be
+    left in hot paths. Optionally, cProfile can run on the GUI thread as well.
+    """
+
+    def __init__(self, max_events=200_000):
+        self.enabled = False
+        self.events = deque(maxlen=max_events)
+        self.profiler = None
+        self._origin = perf_counter()
+        self._pid = os.getpid()
+
+    def _timestamp(self, moment):
+        return (moment - self._origin) * 1_000_000
+
+    def add_span(self, name, start, end, **args):
+        self.events.append(
+            {
+                "name": name,
+                "ph": "X",
+                "ts": self._timestamp(start),
+                "dur": (end - start) * 1_000_000,
+                "pid": self._pid,
+                "tid": threading.get_ident(),
+                "args": args,
+            }
+        )
+
+    def add_instant(self, name, **args):
+        self.events.append(
+            {
+                "name": name,
+                "ph": "i",
+                "s": "t",
+                "ts": self._timestamp(perf_counter()),
+                "pid": self._pid,
+                "tid": threading.get_ident(),
+                "args": args,
+            }
+        )
+
+    @contextmanager
+    def span(self, name, **args):
+        if not self.enabled:
+            yield
+            return
+
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, perf_counter(), **args)
+
+    def start(self, profile=False):
+        self.events.clear()
+        self.enabled = True
+        if profile:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        logging.info("Started tracing")
+
+    def stop(self):
+        self.enabled = False
+        if self.profiler:
+            self.profiler.disable()
+        logging.info(f"Stopped tracing with {len(self.events)} events")
+
+    def save_trace(self, path):
+        thread_names = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": self._pid,
+                "tid": thread.ident,
+                "args": {"name": thread.name},
+            }
+            for thread in threading.enumerate()
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "traceEvents": thread_names + list(self.events),
+                    "displayTimeUnit": "ms",
+                },
+                f,
+            )
+
+    def save_stats(self, path):
+        if not self.profiler:
+            raise RuntimeError("The profiler hasn't been run")
+        # Snapshotting the stats disables the profiler, so pick back up if
+        # we're still recording
+        try:
+            self.profiler.dump_stats(path)
+        finally:
+            if self.enabled:
+                self.profiler.enable()
+
+
+TRACER = Tracer()
+
+
+def traced(name):
+    """Decorate a function so that each call is recorded as a span."""
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return function(*args, **kwargs)
+            with TRACER.span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class EventLoopMonitor(QObject):
+    """Record a span whenever the event loop takes noticeably longer than it
+    should to get back to a timer, which is what makes the overlays stutter."""
+
+    def __init__(self, tracer=TRACER, interval=50, threshold=50):
+        super().__init__()
+        self.tracer = tracer
+        self.interval = interval
+        self.threshold = threshold
+        self._last = None
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.tick)
+
+    def start(self):
+        self._last = perf_counter()
+        self.timer.start(self.interval)
+
+    def stop(self):
+        self.timer.stop()
+
+    def tick(self):
+        now = perf_counter()
+        lag = (now - self._last) * 1000 - self.interval
+        if lag > self.threshold:
+            self.tracer.add_span(
+                "event loop stall", self._last, now, lag_ms=round(lag, 1)
+            )
+        self._last = now
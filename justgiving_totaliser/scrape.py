@@ -1,96 +1,405 @@
+from collections import defaultdict, deque, namedtuple
+from concurrent.futures import (
+    CancelledError,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    TimeoutError,
+    as_completed,
+)
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
 from decimal import Decimal
+from functools import lru_cache
 import logging
+import multiprocessing
+import re
+import threading
+from time import monotonic
+from urllib.parse import urlsplit
 
 import requests
 from bs4 import BeautifulSoup
 
 from PyQt5.QtCore import QObject, QRunnable, pyqtSignal, pyqtSlot
 
-from .types import Donor, Total, NULL_DONOR
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
 
+from .breaker import CircuitBreaker
+from . import graphql
+from .common import known_currencies
+from .donors import find_window
+from .pages import PageResolver, canonical_page
+from .currency import MINOR_UNITS, RATES, MissingRate, from_minor, to_minor
+from .metrics import (
+    fetch_bytes,
+    fetch_errors,
+    fetch_seconds,
+    getter_results,
+    hedged_requests,
+    parse_seconds,
+)
+from .profiling import traced
+from .types import HIDDEN_AMOUNT, DonationAmount, Donor, Total, NULL_DONOR
 
-known_currencies = {
-    "GBP": "£",
-    "USD": "$",
-    "EUR": "€",
-    "AUD": "AU$",
-    "NZD": "NZ$",
-    "CAD": "CA$",
-}
+currency_codes = {symbol: code for code, symbol in known_currencies.items()}
+_amount_pattern = re.compile(
+    r"\s*([^\d\s.,+]*)\s*(\d[\d,]*(?:\.\d+)?)"
+    r"(?:\s*\+\s*[^\d\s.,]*\s*(\d[\d,]*(?:\.\d+)?)\s*Gift Aid)?"
+)
+_hidden_pattern = re.compile(r"\s*(amount\s+)?(hidden|private)\s*$", re.IGNORECASE)
+
+page_breaker = CircuitBreaker("JustGiving page")
+graphql_breaker = CircuitBreaker("JustGiving GraphQL")
+
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+MIN_HEDGE_DELAY = 0.25
+
+# requests can only decode Brotli if one of the brotli packages is installed
+ACCEPT_ENCODING = "br, gzip, deflate" if brotli else "gzip, deflate"
+PAGE_CHUNK_SIZE = 1 << 14
+
+# Once the totals and enough complete supporter blocks have gone past, there's
+# no need to read the rest of the page
+_totals_marker = b"raised of"
+_supporter_marker = b"SupporterDetails_content"
+
+_hedge_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="fetch")
+_poll = threading.local()
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+_parse_futures = set()
+
+# The text of the totals, and any errors finding it, are keyed by the name of
+# the getter that turns that text into a Total
+ParsedPage = namedtuple("ParsedPage", ["totals_text", "errors", "donors"])
+
+
+class PollBudgetExceeded(RuntimeError):
+    pass
+
+
+class LatencyTracker:
+    """Keep the most recent request latencies for each host, to estimate how
+    long a slow request takes."""
+
+    def __init__(self, size=100, min_samples=10):
+        self.min_samples = min_samples
+        self._samples = defaultdict(lambda: deque(maxlen=size))
+        self._lock = threading.Lock()
+
+    def record(self, host, seconds):
+        with self._lock:
+            self._samples[host].append(seconds)
+
+    def quantile(self, host, q=0.95):
+        """Return the `q` quantile of recent latencies for `host`, or None if
+        there aren't enough of them to say."""
+
+        with self._lock:
+            samples = sorted(self._samples[host])
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+
+latencies = LatencyTracker()
+
+
+@contextmanager
+def poll_budget(seconds):
+    """Limit how long the fetches made in this thread may take in total."""
+
+    _poll.deadline = monotonic() + seconds if seconds else None
+    try:
+        yield
+    finally:
+        _poll.deadline = None
+
+
+def check_budget():
+    deadline = getattr(_poll, "deadline", None)
+    if deadline is not None and monotonic() > deadline:
+        raise PollBudgetExceeded("Ran out of time for this poll")
+
+
+def timeouts():
+    """Return the (connect, read) timeouts, trimmed to fit the poll budget."""
 
+    deadline = getattr(_poll, "deadline", None)
+    if deadline is None:
+        return CONNECT_TIMEOUT, READ_TIMEOUT
 
-def query_graphql(query):
-    url = "https://graphql.justgiving.com/"
-    response = requests.post(url, json={"query": query})
+    check_budget()
+    remaining = deadline - monotonic()
+    return min(CONNECT_TIMEOUT, remaining), min(READ_TIMEOUT, remaining)
 
+
+def _fetch_once(method, url, host, **kwargs):
+    try:
+        with fetch_seconds.time(host=host):
+            start = monotonic()
+            response = requests.request(method, url, **kwargs)
+            latencies.record(host, monotonic() - start)
+    except requests.exceptions.RequestException:
+        fetch_errors.inc(host=host)
+        raise
+
+    if not kwargs.get("stream"):
+        fetch_bytes.inc(len(response.content), host=host)
     if not 200 <= response.status_code < 300:
-        raise RuntimError(f"{response.status_code} from graphql server")
+        fetch_errors.inc(host=host)
+    return response
+
+
+def _close_response(future):
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+@traced("fetch")
+def fetch(method, url, hedge=True, **kwargs):
+    """Make an HTTP request, recording how long it took and how much came back.
+
+    If it takes longer than the 95th percentile of recent requests to the same
+    host, a second identical request is sent, and whichever answers first
+    wins."""
+
+    host = urlsplit(url).hostname
+    kwargs.setdefault("timeout", timeouts())
+    kwargs["headers"] = {
+        "Accept-Encoding": ACCEPT_ENCODING,
+        **kwargs.get("headers", {}),
+    }
+
+    delay = latencies.quantile(host) if hedge else None
+    if delay is None:
+        return _fetch_once(method, url, host, **kwargs)
+
+    first = _hedge_pool.submit(_fetch_once, method, url, host, **kwargs)
+    try:
+        return first.result(timeout=max(delay, MIN_HEDGE_DELAY))
+    except TimeoutError:
+        pass
+
+    logging.debug(f"Request to {host} slower than {delay:.2f}s; hedging")
+    hedged_requests.inc(host=host)
+    second = _hedge_pool.submit(_fetch_once, method, url, host, **kwargs)
+    for future in as_completed([first, second]):
+        if future.exception() is None:
+            # Give the loser's connection back to the pool once it answers
+            loser = second if future is first else first
+            loser.add_done_callback(_close_response)
+            return future.result()
+    return first.result()
+
+
+graphql_client = graphql.GraphQLClient(fetch, graphql_breaker)
+
+
+def read_page(response, num_donors):
+    """Read a streamed page only as far as needed to find the totals and
+    `num_donors` supporter blocks, and return the bytes read. Reading stops once a
+    block after those has started, since the last one needed is then complete.
+    """
+
+    body = bytearray()
+    found_totals = False
+    supporters = 0
+    try:
+        for chunk in response.iter_content(PAGE_CHUNK_SIZE):
+            # Markers may straddle chunks, so look back over the join
+            start = max(0, len(body) - len(_supporter_marker) + 1)
+            body += chunk
+            if not found_totals:
+                found_totals = body.find(_totals_marker) >= 0
+            supporters += body.count(_supporter_marker, start)
+            if found_totals and supporters > num_donors:
+                # Drop the partial block, from the start of its tag
+                del body[body.rfind(b"<", 0, body.rfind(_supporter_marker)) :]
+                break
+            check_budget()
+    finally:
+        response.close()
+
+    host = urlsplit(response.url).hostname
+    transferred = getattr(response.raw, "tell", lambda: len(body))()
+    fetch_bytes.inc(transferred, host=host)
+    return bytes(body)
+
+
+def start_parse_process():
+    """Start the process that pages are parsed in, if it isn't running yet.
+
+    Parsing holds the GIL for long enough to make the marquee and countdown
+    stutter; in a separate process it runs alongside them instead."""
+
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is not None:
+            return
+        # Forking with Qt's threads running isn't safe, so start afresh
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        )
+        # Get the imports out of the way before the first poll needs it
+        _parse_pool.submit(parse_page, b"<html></html>", "utf-8")
 
-    return response.json()
 
+def stop_parse_process():
+    global _parse_pool
+    with _parse_pool_lock:
+        pool, _parse_pool = _parse_pool, None
+        pending = list(_parse_futures)
+    if pool is not None:
+        # shutdown() can only cancel futures itself from Python 3.9
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=False)
 
-def get_totals_fallback(soup, _):
+
+def parse_page(markup, encoding=None):
+    """Parse the raw bytes of a page into a ParsedPage. This takes and returns
+    only plain data, and leaves turning the text of the totals into Totals to
+    the caller, so that it can run in the parse process."""
+
+    soup = BeautifulSoup(markup=markup, features="html.parser", from_encoding=encoding)
+
+    totals_text = {}
+    errors = {}
+    for getter, (find_text, _) in _page_totals.items():
+        try:
+            totals_text[getter] = find_text(soup)
+        except Exception as ex:
+            errors[getter] = repr(ex)
+
+    return ParsedPage(totals_text, errors, get_donors(soup))
+
+
+def parse(markup, encoding=None):
+    """Parse a page in the parse process if it is running, or here if not."""
+
+    pool = _parse_pool
+    if pool is not None:
+        try:
+            future = pool.submit(parse_page, markup, encoding)
+        except RuntimeError as ex:
+            # Shut down while this poll was under way
+            logging.debug(f"Parse process unavailable: {ex}")
+        else:
+            with _parse_pool_lock:
+                _parse_futures.add(future)
+            try:
+                return future.result()
+            except BrokenProcessPool as ex:
+                logging.warning(f"Parse process died ({ex}); restarting it")
+                stop_parse_process()
+                start_parse_process()
+            except CancelledError:
+                logging.debug("Parse process stopped while parsing")
+            finally:
+                with _parse_pool_lock:
+                    _parse_futures.discard(future)
+    return parse_page(markup, encoding)
+
+
+def query_graphql(query, **variables):
+    return graphql_client.execute(query, **variables)
+
+
+page_resolver = PageResolver(fetch)
+
+
+def find_totals_fallback_text(soup):
     raised_block = soup.find_all("dd")[0]
     amount_block = raised_block.find_all("div")[0]
-    raised_text = amount_block.text
+    return (str(amount_block.text),)
+
+
+@traced("get_totals_fallback")
+def get_totals_fallback(soup, _):
+    return totals_from_fallback_text(*find_totals_fallback_text(soup))
+
+
+def totals_from_fallback_text(raised_text):
     currency = raised_text[0]
     raised = Decimal(raised_text[1:].replace(",", ""))
     return Total(raised, None, currency)
 
 
+@traced("get_totals_graphql")
 def get_totals_graphql(_, url):
-    slug = get_slug(url)
-    query = f"""
-    {{
-      page(slug: "{slug}", type: ONE_PAGE) {{
-        targetWithCurrency {{
-          value
-          currencyCode
-        }}
-        donationSummary {{
-          totalAmount {{
-            value
-            currencyCode
-          }}
-        }}
-      }}
-    }}"""
-
-    result = query_graphql(query)
-    currency_code = result["data"]["page"]["donationSummary"]["totalAmount"][
-        "currencyCode"
-    ]
-    assert currency_code == result["data"]["page"]["targetWithCurrency"]["currencyCode"]
-
-    target = normalise_currency(
-        currency_code, result["data"]["page"]["targetWithCurrency"]["value"]
-    )
-    raised = normalise_currency(
-        currency_code, result["data"]["page"]["donationSummary"]["totalAmount"]["value"]
+    page = page_resolver.resolve(url)
+    result = query_graphql(graphql.TOTALS, slug=page.slug, type=page.type)
+    return totals_from_graphql(result["data"]["page"])
+
+
+def totals_from_graphql(page):
+    raised_amount = page["donationSummary"]["totalAmount"]
+    target_amount = page["targetWithCurrency"]
+    currency_code = raised_amount["currencyCode"]
+
+    raised = normalise_currency(currency_code, raised_amount["value"])
+    target = RATES.convert_major(
+        normalise_currency(target_amount["currencyCode"], target_amount["value"]),
+        target_amount["currencyCode"],
+        currency_code,
     )
     currency = known_currencies.get(currency_code, f"{currency_code} ")
     return Total(raised, target, currency)
 
 
-def get_totals(soup, _):
+def find_totals_text(soup):
     raised_of_block = soup.find(string="raised of")
     relevant_block = raised_of_block.find_parents()
 
     raised_text = relevant_block[1].previousSibling.string
     target_text = relevant_block[0].nextSibling.nextSibling.string
+    return str(raised_text), str(target_text)
 
-    currency = raised_text[0]
-    if target_text[0] != currency:
-        raise ValueError(
-            f"Currencies are not consistent! Raised is in {currency}, but total in {target_text[0]}"
-        )
 
+@traced("get_totals")
+def get_totals(soup, _):
+    return totals_from_text(*find_totals_text(soup))
+
+
+def totals_from_text(raised_text, target_text):
+    currency = raised_text[0]
     raised = Decimal(raised_text[1:].replace(",", ""))
     target = Decimal(target_text[1:].replace(",", ""))
 
+    if target_text[0] != currency:
+        try:
+            target = RATES.convert_major(
+                target,
+                currency_codes.get(target_text[0], target_text[0]),
+                currency_codes.get(currency, currency),
+            )
+        except MissingRate as ex:
+            raise ValueError(
+                f"Currencies are not consistent! Raised is in {currency}, "
+                f"but total in {target_text[0]}, and {ex}"
+            )
+
     return Total(raised, target, currency)
 
 
+# How to find the text of the totals in a page, and how to turn that text into
+# a Total, for the getters that only need the page
+_page_totals = {
+    "get_totals": (find_totals_text, totals_from_text),
+    "get_totals_fallback": (find_totals_fallback_text, totals_from_fallback_text),
+}
+
+
+@traced("get_donors")
 def get_donors(soup):
     donors = []
     for relevant_block in soup.findAll(
@@ -103,107 +412,206 @@ def get_donors(soup):
         else:
             comment = None
         if len(children) > 2:
-            amount = children[2].text
+            donors.append(donor_from_text(name, comment, children[2].text))
         else:
-            amount = None
-
-        donors.append(Donor(name, comment, amount))
+            donors.append(Donor(name, comment))
 
     return donors
 
 
 def normalise_currency(currencyCode, value):
-    if currencyCode in known_currencies:
-        return Decimal(value) / 100
+    """Convert an amount from GraphQL, in minor units, to major units."""
+
+    if currencyCode in MINOR_UNITS:
+        return from_minor(currencyCode, value)
     return Decimal(value)
 
 
-def currency_to_string(currencyCode, value):
-    normalised_value = normalise_currency(currencyCode, value)
-    symbol = known_currencies.get(currencyCode, f"{currencyCode} ")
-    return f"{symbol}{normalised_value}"
-
-
-def get_donors_graphql(soup, slug, num_donors):
-    query = f"""
-    {{
-      page(slug: "{slug}", type: ONE_PAGE) {{
-        donations (last: {num_donors}) {{
-          nodes {{
-            amount {{
-              currencyCode
-              value
-            }}
-            message
-            displayName
-          }}
-        }}
-      }}
-    }}"""
-
-    result = query_graphql(query)
+def to_minor_units(currencyCode, value):
+    return to_minor(currencyCode, normalise_currency(currencyCode, value))
+
+
+def parse_amount_text(text):
+    """Parse a donation amount as displayed by JustGiving, such as
+    "£10.00 + £2.50 Gift Aid", into minor units of amount and Gift Aid and a
+    currency code. Return None if it can't be parsed."""
+
+    match = _amount_pattern.match(text or "")
+    if not match:
+        return None
+
+    symbol, amount, gift_aid = match.groups()
+    currency = currency_codes.get(symbol, symbol)
+    amount = to_minor(currency, Decimal(amount.replace(",", "")))
+    gift_aid = to_minor(currency, Decimal(gift_aid.replace(",", ""))) if gift_aid else 0
+    return amount, currency, gift_aid
+
+
+@lru_cache(maxsize=1024)
+def parse_amount(text):
+    """Parse a donation amount as displayed by JustGiving into a
+    DonationAmount. The same few amounts turn up again and again, so the
+    results are shared."""
+
+    if text is None or _hidden_pattern.match(text):
+        return HIDDEN_AMOUNT
+    if parsed := parse_amount_text(text):
+        amount, currency, gift_aid = parsed
+        return DonationAmount(amount, currency, gift_aid)
+    return DonationAmount(text=text)
+
+
+def donor_from_text(name, comment, amount_text):
+    return Donor(name, comment, donation_amount=parse_amount(amount_text))
+
+
+@traced("get_donors_graphql")
+def get_donors_graphql(soup, slug, num_donors, page_type="ONE_PAGE"):
+    result = query_graphql(
+        graphql.RECENT_DONATIONS, slug=slug, type=page_type, count=num_donors
+    )
     raw_donations = result["data"]["page"]["donations"]["nodes"]
-    donations = []
-
-    for raw_donation in raw_donations:
-        donations.append(
-            Donor(
-                raw_donation["displayName"],
-                raw_donation["message"],
-                currency_to_string(**raw_donation["amount"])
-                if raw_donation["amount"]
-                else None,
-            )
+    return [donor_from_graphql(raw_donation) for raw_donation in raw_donations]
+
+
+def donor_from_graphql(raw_donation):
+    if raw_amount := raw_donation["amount"]:
+        donation_amount = DonationAmount(
+            to_minor_units(**raw_amount), raw_amount["currencyCode"]
+        )
+    else:
+        donation_amount = HIDDEN_AMOUNT
+
+    return Donor(
+        raw_donation["displayName"],
+        raw_donation["message"],
+        id=raw_donation.get("id"),
+        donation_amount=donation_amount,
+    )
+
+
+@traced("get_missed_donations")
+def get_missed_donations(url, seen, page_size=50, max_pages=20):
+    """Page back through the donations to `url`, newest first, until reaching
+    the window of donors in `seen`. Return the donors before it, newest first,
+    and whether it was reached; if not, some donations may still be missing."""
+
+    page = page_resolver.resolve(url)
+    gathered = []
+    cursor = None
+    for _ in range(max_pages):
+        result = query_graphql(
+            graphql.DONATIONS_BEFORE,
+            slug=page.slug,
+            type=page.type,
+            count=page_size,
+            before=cursor,
         )
+        donations = result["data"]["page"]["donations"]
+        gathered += [donor_from_graphql(node) for node in donations["nodes"]]
 
-    return donations
+        page_info = donations["pageInfo"]
+        last_page = not page_info["hasPreviousPage"]
+        # A window that runs off the end of this page needs the next to confirm
+        offset = find_window(gathered, seen, partial=last_page)
+        if offset is not None:
+            return gathered[:offset], True
+        if last_page:
+            return gathered, True
+        cursor = page_info["startCursor"]
+
+    logging.warning(f"Gave up catching up after {len(gathered)} donations")
+    return gathered, False
 
 
 def get_slug(url):
-    site = "justgiving.com/"
-    if site not in url:
-        raise ValueError("URL is not on justgiving.com, giving up")
-    slug = url[url.index(site) + len(site) :]
-    if "?" in slug:
-        slug = slug[: slug.index("?")]
+    return canonical_page(url).slug
+
+
+@traced("get_data")
+def get_data(url, num_donors=5, budget=None):
+    """Given a JustGiving `url`, return the current total and target amounts, and the currency symbol.
 
-    return slug
+    If `budget` is given, give up with PollBudgetExceeded once that many
+    seconds have passed, rather than return data that is already out of date."""
 
+    with poll_budget(budget):
+        data = _get_data(url, num_donors)
+        check_budget()
+    return data
 
-def get_data(url, num_donors=5):
-    """Given a JustGiving `url`, return the current total and target amounts, and the currency symbol."""
+
+def _get_data(url, num_donors):
 
     logging.debug("get_data entered")
-    response = requests.get(url)
-    if not 200 <= response.status_code < 300:
-        raise RuntimeError(
-            f"Couldn't get data from the server; got a {response.status_code} error."
-        )
+    page = page_resolver.resolve(url)
+    url = page.url
+    try:
+        with page_breaker:
+            response = fetch("GET", url, stream=True)
+            if not 200 <= response.status_code < 300:
+                response.close()
+                raise RuntimeError(
+                    "Couldn't get data from the server; "
+                    f"got a {response.status_code} error."
+                )
+            markup = read_page(response, num_donors)
+            encoding = response.encoding
+    except (requests.exceptions.RequestException, RuntimeError) as ex:
+        logging.debug(f"Page unavailable ({ex}), trying GraphQL alone")
+        try:
+            return get_data_graphql(url, num_donors)
+        except Exception as graphql_ex:
+            logging.debug(f"GraphQL unavailable too: {graphql_ex}")
+            raise ex
 
-    soup = BeautifulSoup(markup=response.text, features="html.parser")
+    with parse_seconds.time(getter="soup"):
+        parsed = parse(markup, encoding)
     for total_getter in [get_totals, get_totals_graphql, get_totals_fallback]:
+        getter = total_getter.__name__
         try:
-            totals = total_getter(soup, url)
+            if getter in parsed.errors:
+                raise ValueError(parsed.errors[getter])
+            with parse_seconds.time(getter=getter):
+                if getter in _page_totals:
+                    _, from_text = _page_totals[getter]
+                    totals = from_text(*parsed.totals_text[getter])
+                else:
+                    totals = total_getter(None, url)
         except Exception as ex:
+            logging.debug(f"{getter} failed: {ex!r}")
+            getter_results.inc(getter=getter, result="failure")
             continue
         else:
+            getter_results.inc(getter=getter, result="success")
             break
     else:
         totals = Total(Decimal(0), Decimal(0), "£")
 
-    donors = get_donors(soup)
-
+    donors = parsed.donors
     if len(donors) < num_donors:
         try:
-            slug = get_slug(url)
-            donors = get_donors_graphql(soup, slug, num_donors)
+            donors = get_donors_graphql(None, page.slug, num_donors, page.type)
         except (requests.exceptions.RequestException, RuntimeError) as ex:
             print(f"Couldn't get graphql: {ex}")
 
     return totals, donors
 
 
-def fake_get_data(url, num_donors=5):
+def get_data_graphql(url, num_donors=5):
+    """Get totals and donors from GraphQL only, for when the page itself is
+    unavailable."""
+
+    page = page_resolver.resolve(url)
+    result = query_graphql(
+        graphql.TOTALS_AND_DONATIONS, slug=page.slug, type=page.type, count=num_donors
+    )
+    page = result["data"]["page"]
+    donors = [donor_from_graphql(node) for node in page["donations"]["nodes"]]
+    return totals_from_graphql(page), donors
+
+
+def fake_get_data(url, num_donors=5, budget=None):
     """Return an implausible JustGiving response."""
 
     return Total(Decimal(2000), Decimal(1000), "£"), []
@@ -213,15 +621,32 @@ class DataSignals(QObject):
     finished = pyqtSignal(tuple)
 
 
+class CatchUpGetter(QRunnable):
+    def __init__(self, url, seen, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.url = url
+        self.seen = seen
+        self.signals = DataSignals()
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            self.signals.finished.emit(get_missed_donations(self.url, self.seen))
+        except Exception as ex:
+            logging.warning(f"Couldn't catch up on missed donations: {ex!r}")
+            self.signals.finished.emit((ex, None))
+
+
 class DataGetter(QRunnable):
     local_get_data = staticmethod(get_data)
 
-    def __init__(self, url, num_donors=5, *args, **kwargs):
+    def __init__(self, url, num_donors=5, budget=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         logging.debug("DataGetter created.")
 
         self.url = url
         self.num_donors = num_donors
+        self.budget = budget
         self.signals = DataSignals()
 
     @pyqtSlot()
@@ -230,7 +655,9 @@ class DataGetter(QRunnable):
         if not self.url:
             self.signals.finished.emit((None, None))
         try:
-            self.signals.finished.emit(self.local_get_data(self.url, self.num_donors))
+            self.signals.finished.emit(
+                self.local_get_data(self.url, self.num_donors, self.budget)
+            )
         except Exception as ex:
             logging.debug(f"Couldn't get_data due to {ex}")
             self.signals.finished.emit((ex, None))
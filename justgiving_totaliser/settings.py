@@ -1 +1,96 @@
+from contextlib import contextmanager
+import logging
+
+from PyQt5.QtCore import QObject, QSettings, QTimer
+
 DEFAULT_FONT = "Arial"
+
+
+def _convert(value, type):
+    if type is bool and isinstance(value, str):
+        # Some QSettings backends hand booleans back as strings
+        return value.lower() == "true"
+    return type(value)
+
+
+class CachedSettings(QObject):
+    """An in-memory copy of the application's QSettings.
+
+    Everything is read in one pass when created, and reads after that come from
+    memory. Writes are held back and saved together once no more have arrived
+    for `flush_delay` milliseconds, or when flush() is called; call it before
+    quitting."""
+
+    def __init__(self, *args, flush_delay=2000, backend=None):
+        super().__init__()
+        self.backend = backend if backend is not None else QSettings(*args)
+        self.flush_delay = flush_delay
+
+        self._values = {key: self.backend.value(key) for key in self.backend.allKeys()}
+        self._pending = {}
+        self._removed = set()
+        self._applying = False
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+    def value(self, key, defaultValue=None, type=None):
+        value = self._values.get(key, defaultValue)
+        if type is not None and value is not None:
+            value = _convert(value, type)
+        return value
+
+    def setValue(self, key, value):
+        if self._applying:
+            return
+        self._values[key] = value
+        self._pending[key] = value
+        self._removed.discard(key)
+        self.timer.start(self.flush_delay)
+
+    def replace(self, values):
+        """Swap in a whole new set of values in one go."""
+
+        self._removed |= set(self._values) - set(values)
+        self._values = dict(values)
+        self._pending = dict(values)
+        self.timer.start(self.flush_delay)
+
+    @contextmanager
+    def applying(self):
+        """Ignore writes while the windows are brought into line with settings
+        that were just read, since they would only write the same values back."""
+
+        self._applying = True
+        try:
+            yield
+        finally:
+            self._applying = False
+
+    def all_values(self):
+        return dict(self._values)
+
+    def contains(self, key):
+        return key in self._values
+
+    def allKeys(self):
+        return list(self._values)
+
+    def flush(self):
+        self.timer.stop()
+        if not (self._pending or self._removed):
+            return
+
+        for key in self._removed:
+            self.backend.remove(key)
+        for key, value in self._pending.items():
+            self.backend.setValue(key, value)
+        self._pending = {}
+        self._removed = set()
+
+        self.backend.sync()
+        if self.backend.status() != QSettings.NoError:
+            logging.warning(f"Couldn't save settings: status {self.backend.status()}")
+
+    sync = flush
@@ -0,0 +1,137 @@
+from collections import OrderedDict, namedtuple
+import atexit
+import logging
+import os
+import shutil
+import sys
+import tempfile
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+try:
+    import pyttsx3
+except ImportError:
+    pyttsx3 = None
+
+
+_suffix = ".aiff" if sys.platform == "darwin" else ".wav"
+
+# Rendered speech depends on the voice and rate as well as the message
+SpeechKey = namedtuple("SpeechKey", ["message", "voice", "rate"])
+
+
+class SpeechCache:
+    """Least-recently-used cache of rendered speech files, deleting files as
+    they are evicted."""
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        path = self._entries.get(key)
+        if path is not None:
+            self._entries.move_to_end(key)
+        return path
+
+    def put(self, key, path):
+        self._entries[key] = path
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            _, evicted = self._entries.popitem(last=False)
+            try:
+                os.remove(evicted)
+            except OSError:
+                pass
+
+
+class RenderSignals(QObject):
+    finished = pyqtSignal(object, object)
+
+
+class RenderJob(QRunnable):
+    def __init__(self, key, path, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.key = key
+        self.path = path
+        self.signals = RenderSignals()
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            engine = pyttsx3.init()
+            if self.key.voice is not None:
+                engine.setProperty("voice", self.key.voice)
+            if self.key.rate is not None:
+                engine.setProperty("rate", self.key.rate)
+            engine.save_to_file(self.key.message, self.path)
+            engine.runAndWait()
+        except Exception as ex:
+            logging.warning(f"Couldn't render speech due to {ex}")
+            self.signals.finished.emit(self.key, None)
+        else:
+            self.signals.finished.emit(self.key, self.path)
+
+
+class SpeechRenderer(QObject):
+    """Render announcements to audio files ahead of time with an offline TTS
+    engine, so they can be played back without waiting for synthesis. Emits
+    `rendered` with the message once each render has finished, whether or not
+    it succeeded.
+
+    `voice` and `rate` are passed to the engine, or left to its defaults when
+    None. They can be changed at any time; speech rendered with other settings
+    is never returned."""
+
+    rendered = pyqtSignal(str)
+
+    def __init__(self, max_entries=64, voice=None, rate=None):
+        super().__init__()
+        self.voice = voice
+        self.rate = rate
+        self.cache = SpeechCache(max_entries)
+        self.in_flight = set()
+
+        self.directory = tempfile.mkdtemp(prefix="justgiving_totaliser_speech_")
+        atexit.register(shutil.rmtree, self.directory, ignore_errors=True)
+
+        # The TTS engines aren't thread-safe, so only ever render one at a time
+        self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(1)
+        self._counter = 0
+
+    @staticmethod
+    def available():
+        # pyttsx3's macOS driver has to run on the main thread's run loop, so
+        # it can't render in the background there
+        return pyttsx3 is not None and sys.platform != "darwin"
+
+    def _key(self, message):
+        return SpeechKey(message, self.voice, self.rate)
+
+    def get(self, message):
+        return self.cache.get(self._key(message))
+
+    def rendering(self, message):
+        return self._key(message) in self.in_flight
+
+    def render(self, message):
+        key = self._key(message)
+        if not message or key in self.cache or key in self.in_flight:
+            return
+
+        self._counter += 1
+        path = os.path.join(self.directory, f"{self._counter}{_suffix}")
+        job = RenderJob(key, path)
+        job.signals.finished.connect(self.finish_render)
+        self.in_flight.add(key)
+        self.thread_pool.start(job)
+
+    def finish_render(self, key, path):
+        self.in_flight.discard(key)
+        if path and os.path.exists(path):
+            self.cache.put(key, path)
+        self.rendered.emit(key.message)
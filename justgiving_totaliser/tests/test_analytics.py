@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from justgiving_totaliser.analytics import DonationAnalytics, RingBuffer
+
+
+def test_ring_buffer_evicts_oldest():
+    buffer = RingBuffer(3)
+    for i in range(3):
+        assert buffer.append(i, i * 10) is None
+    assert buffer.append(3, 30) == (0, 0)
+    assert [buffer[i] for i in range(len(buffer))] == [(1, 10), (2, 20), (3, 30)]
+    assert buffer[-1] == (3, 30)
+
+
+def test_rolling_rates():
+    analytics = DonationAnalytics(window=timedelta(minutes=10))
+    for minute in range(20):
+        analytics.add_total(100 + minute * 10, now=minute * 60)
+        analytics.add_donations([10], now=minute * 60)
+
+    assert analytics.per_hour() == 600
+    assert analytics.donations_per_minute(now=19 * 60) == 1
+    assert analytics.donation_sum == 100
+    assert analytics.time_to(390) == timedelta(minutes=10)
+    assert analytics.time_to(100) == timedelta()
@@ -0,0 +1,36 @@
+import pytest
+
+from justgiving_totaliser.breaker import CircuitBreaker, CircuitOpenError
+
+
+def fail(breaker):
+    with pytest.raises(RuntimeError):
+        with breaker:
+            raise RuntimeError("down")
+
+
+def test_opens_after_repeated_failures():
+    breaker = CircuitBreaker("test", failure_threshold=2, cool_off=60)
+    fail(breaker)
+    assert breaker.state == breaker.CLOSED
+    fail(breaker)
+    assert breaker.state == breaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        with breaker:
+            pass
+
+
+def test_half_open_probe():
+    breaker = CircuitBreaker("test", failure_threshold=1, cool_off=0)
+    fail(breaker)
+    assert breaker.state == breaker.OPEN
+
+    fail(breaker)
+    assert breaker.state == breaker.OPEN
+
+    breaker.cool_off = 0
+    with breaker:
+        assert breaker.state == breaker.HALF_OPEN
+    assert breaker.state == breaker.CLOSED
+    assert breaker.cool_off == 0
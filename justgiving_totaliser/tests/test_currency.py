@@ -0,0 +1,35 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+
+from justgiving_totaliser.common import format_amount
+from justgiving_totaliser.currency import MissingRate, RateTable, minor_units
+
+
+def test_minor_units():
+    assert minor_units("GBP") == 2
+    assert minor_units("JPY") == 0
+    assert minor_units("KWD") == 3
+    assert format_amount(1500, "JPY") == "JPY 1,500"
+    assert format_amount(1500, "GBP") == "£15.00"
+
+
+def test_conversion():
+    rates = RateTable("GBP", {"USD": "1.25", "JPY": "190"})
+    assert rates.convert(1000, "GBP", "USD") == 1250
+    assert rates.convert(1250, "USD", "GBP") == 1000
+    assert rates.convert(1000, "GBP", "JPY") == 1900
+    assert rates.convert_major(Decimal(10), "USD", "USD") == Decimal(10)
+    assert rates.convert_major(Decimal(10), "GBP", "USD") == Decimal("12.50")
+    assert rates.expired(timedelta(days=1))
+
+    with pytest.raises(MissingRate):
+        rates.convert(1000, "GBP", "EUR")
+
+
+def test_rates_round_trip(tmp_path):
+    path = tmp_path / "rates.json"
+    RateTable("GBP", {"EUR": "1.17"}).save(path)
+    rates = RateTable.from_file(path)
+    assert rates.convert(100, "EUR", "GBP") == 85
@@ -0,0 +1,81 @@
+from justgiving_totaliser.donors import DonorIndex, TopDonations
+from justgiving_totaliser.types import Donor
+
+
+def anonymous():
+    return Donor("Anonymous", None, 500, "GBP")
+
+
+def test_first_window_has_no_new_donors():
+    index = DonorIndex()
+
+    assert index.update([anonymous(), Donor("A", None, 100, "GBP")]) is None
+    assert len(index) == 2
+
+
+def test_duplicate_looking_donations_are_all_new():
+    index = DonorIndex()
+    older = [anonymous(), Donor("A", "Hi", 100, "GBP"), Donor("B", None, 200, "GBP")]
+    index.update(older)
+
+    new_donors = index.update([anonymous(), anonymous(), *older[:2]])
+
+    assert new_donors == [anonymous(), anonymous()]
+    assert index.donors[2] is older[0]
+
+
+def test_unchanged_window():
+    index = DonorIndex()
+    window = [anonymous(), anonymous(), Donor("A", None, 100, "GBP")]
+    index.update(window)
+
+    assert index.update(list(window)) == []
+
+
+def test_window_grows():
+    index = DonorIndex()
+    donors = [Donor(f"D{i}", None, 100 * i, "GBP") for i in range(20)]
+    index.update(donors[:10])
+
+    assert index.update([Donor("New", None, 100, "GBP"), *donors]) == [
+        Donor("New", None, 100, "GBP")
+    ]
+    assert len(index) == 21
+    assert index.donors[1] is donors[0]
+    assert len(set(index.keys)) == 21
+
+
+def test_windows_without_overlap():
+    index = DonorIndex()
+    index.update([Donor("A", None, 100, "GBP")])
+
+    assert index.update([Donor("B", None, 100, "GBP")]) is None
+
+
+def test_server_ids():
+    index = DonorIndex()
+    index.update([Donor("A", None, 500, "GBP", id="1")])
+    new_donors = index.update(
+        [
+            Donor("Anonymous", None, 500, "GBP", id="3"),
+            Donor("Anonymous", None, 500, "GBP", id="2"),
+            Donor("A", None, 500, "GBP", id="1"),
+        ]
+    )
+
+    assert [donor.id for donor in new_donors] == ["3", "2"]
+
+
+def test_top_donations():
+    top = TopDonations(size=2)
+    assert top.add([Donor("a", None, 500, "GBP"), Donor("b", None, 100, "GBP")])
+    assert [donor.name for donor in top.donors] == ["a", "b"]
+
+    assert not top.add([Donor("c", None, 50, "GBP"), Donor("d", None, None)])
+    assert top.add([Donor("e", None, 500, "GBP")])
+    assert [donor.name for donor in top.donors] == ["a", "e"]
+
+    assert not top.add([Donor("a", None, 500, "GBP")], check_duplicates=True)
+
+    top.size = 1
+    assert [donor.name for donor in top.donors] == ["a"]
@@ -0,0 +1,48 @@
+from justgiving_totaliser.breaker import CircuitBreaker
+from justgiving_totaliser.graphql import TOTALS, GraphQLClient
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, result):
+        self.result = result
+
+    def json(self):
+        return self.result
+
+
+def test_variables_are_sent_separately():
+    sent = []
+
+    def fetch(method, url, json):
+        sent.append(json)
+        return FakeResponse({"data": {}})
+
+    client = GraphQLClient(fetch, CircuitBreaker("test"))
+    client.execute(TOTALS, slug='page/with "quotes"')
+
+    assert sent[0]["query"] == TOTALS.document
+    assert sent[0]["variables"] == {"slug": 'page/with "quotes"'}
+
+
+def test_persisted_query_falls_back_to_full_document():
+    sent = []
+    responses = iter(
+        [
+            FakeResponse({"errors": [{"message": "PersistedQueryNotFound"}]}),
+            FakeResponse({"data": {"page": None}}),
+        ]
+    )
+
+    def fetch(method, url, json):
+        sent.append(json)
+        return next(responses)
+
+    client = GraphQLClient(fetch, CircuitBreaker("test"), persisted=True)
+    assert client.execute(TOTALS, slug="page") == {"data": {"page": None}}
+
+    assert "query" not in sent[0]
+    assert sent[0]["extensions"]["persistedQuery"]["sha256Hash"] == TOTALS.sha256
+    assert sent[1]["query"] == TOTALS.document
+    assert client.persisted
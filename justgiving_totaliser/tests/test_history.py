@@ -0,0 +1,36 @@
+import pytest
+
+from justgiving_totaliser.history import History, HistoryWriter, iter_records
+
+
+def write_history(path):
+    writer = HistoryWriter(str(path))
+    for i in range(6):
+        writer.record("donation", 100 * (i + 1), "GBP", moment=600 + 20 * i)
+    writer.record("total", 2100, "GBP", moment=720)
+    writer.close()
+
+
+def test_records_round_trip(tmp_path):
+    path = tmp_path / "event.jghist"
+    write_history(path)
+    with open(path, "ab") as f:
+        f.write(b"partial")
+
+    records = list(iter_records(path))
+    assert len(records) == 7
+    assert records[0] == (600, "donation", 100, "GBP")
+    assert records[-1] == (720, "total", 2100, "GBP")
+
+
+def test_aggregates(tmp_path):
+    pytest.importorskip("numpy")
+    path = tmp_path / "event.jghist"
+    write_history(path)
+
+    history = History(path)
+    minutes, sums = history.per_minute()
+    assert list(minutes) == [600, 660]
+    assert list(sums) == [600, 1500]
+    assert list(history.cumulative()[1]) == [100, 300, 600, 1000, 1500, 2100]
+    assert history.percentiles(percentiles=(50,)) == {50: 350}
@@ -0,0 +1,52 @@
+from justgiving_totaliser.metrics import Registry
+
+
+def test_render_counters():
+    registry = Registry(prefix="test")
+    plain = registry.counter("polls_total", "Polls made")
+    labelled = registry.counter("errors_total", "Errors, by host")
+    plain.inc()
+    plain.inc(2)
+    labelled.inc(host="a.example")
+    labelled.inc(host="b.example", kind="timeout")
+
+    lines = registry.render_prometheus().splitlines()
+    assert lines[:3] == [
+        "# HELP test_polls_total Polls made",
+        "# TYPE test_polls_total counter",
+        "test_polls_total 3",
+    ]
+    assert "# TYPE test_errors_total counter" in lines
+    assert 'test_errors_total{host="a.example"} 1' in lines
+    assert 'test_errors_total{host="b.example",kind="timeout"} 1' in lines
+
+
+def test_render_histogram():
+    registry = Registry(prefix="test")
+    histogram = registry.histogram("seconds", "Time taken", buckets=(0.1, 1))
+    for value in 0.05, 0.1, 0.5, 5:
+        histogram.observe(value, getter="graphql")
+
+    lines = registry.render_prometheus().splitlines()
+    assert lines == [
+        "# HELP test_seconds Time taken",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{getter="graphql",le="0.1"} 2',
+        'test_seconds_bucket{getter="graphql",le="1"} 3',
+        'test_seconds_bucket{getter="graphql",le="+Inf"} 4',
+        'test_seconds_count{getter="graphql"} 4',
+        'test_seconds_sum{getter="graphql"} 5.65',
+    ]
+
+
+def test_render_escaping():
+    registry = Registry(prefix="test")
+    counter = registry.counter("odd_total", 'Odd "labels"\nand a \\')
+    counter.inc(path='C:\\say "hi"\n')
+
+    lines = registry.render_prometheus().splitlines()
+    assert lines == [
+        '# HELP test_odd_total Odd "labels"\\nand a \\\\',
+        "# TYPE test_odd_total counter",
+        'test_odd_total{path="C:\\\\say \\"hi\\"\\n"} 1',
+    ]
@@ -0,0 +1,82 @@
+import pytest
+import requests
+
+from justgiving_totaliser.pages import Page, PageResolver, canonical_page
+
+
+def test_canonical_page():
+    assert canonical_page("justgiving.com/page/test/?utm_source=x#top") == Page(
+        "https://www.justgiving.com/page/test", "page/test", "ONE_PAGE"
+    )
+    assert canonical_page("https://www.justgiving.com/team/test").type == "TEAM"
+    with pytest.raises(ValueError):
+        canonical_page("https://example.com/page/test")
+
+
+def test_resolver_follows_redirects_once():
+    calls = []
+
+    class Response:
+        status_code = 200
+        url = "https://www.justgiving.com/page/final"
+
+    def fetch(method, url, **kwargs):
+        calls.append(url)
+        return Response()
+
+    resolver = PageResolver(fetch)
+    for _ in range(3):
+        page = resolver.resolve("https://www.justgiving.com/short")
+    assert page.slug == "page/final"
+    assert calls == ["https://www.justgiving.com/short"]
+
+
+def test_resolver_follows_short_links():
+    class Response:
+        status_code = 200
+        url = "https://www.justgiving.com/page/final?utm_source=short"
+
+    calls = []
+
+    def fetch(method, url, **kwargs):
+        calls.append(url)
+        return Response()
+
+    resolver = PageResolver(fetch)
+    assert resolver.resolve("jg.example/abc").slug == "page/final"
+    assert calls == ["https://jg.example/abc"]
+
+    Response.url = "https://example.com/elsewhere"
+    with pytest.raises(ValueError):
+        resolver.resolve("jg.example/other")
+
+
+def test_resolver_failures():
+    class Response:
+        status_code = 200
+        url = "https://www.justgiving.com/page/final"
+
+    failures = []
+
+    def fetch(method, url, **kwargs):
+        if failures:
+            raise failures[0]
+        return Response()
+
+    resolver = PageResolver(fetch, ttl=0, retry_ttl=0)
+    assert resolver.resolve("jg.example/abc").slug == "page/final"
+
+    # A known short link keeps its last good page while it can't be followed
+    Response.status_code = 503
+    assert resolver.resolve("jg.example/abc").slug == "page/final"
+
+    # but a new one reports why it couldn't be followed
+    with pytest.raises(requests.exceptions.HTTPError):
+        resolver.resolve("jg.example/new")
+    failures.append(requests.exceptions.ConnectionError("down"))
+    with pytest.raises(requests.exceptions.ConnectionError):
+        resolver.resolve("jg.example/new")
+
+    # while JustGiving URLs are taken as they stand
+    page = resolver.resolve("https://www.justgiving.com/page/direct")
+    assert page.slug == "page/direct"
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import json
+
+import pytest
+from PyQt5.QtGui import QColor
+
+from justgiving_totaliser.profiles import decode_value, encode_value, load_profile
+
+
+def test_round_trip():
+    values = [
+        QColor(10, 20, 30, 40),
+        timedelta(hours=1, seconds=30),
+        datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc),
+        Decimal("1234.50"),
+        ["a", 1, 2.5, True, None, Decimal("3")],
+        "plain",
+    ]
+
+    for value in values:
+        assert decode_value(encode_value(value)) == value
+
+
+def test_unknown_values():
+    with pytest.raises(ValueError):
+        encode_value(object())
+    with pytest.raises(ValueError):
+        decode_value({"type": "nonsense", "value": 1})
+
+
+@pytest.mark.parametrize(
+    "profile",
+    [
+        {"version": "1", "settings": {}},
+        {"version": 1, "settings": {"colour": {"type": "colour"}}},
+        {"version": 1, "settings": ["not", "a", "dict"]},
+    ],
+)
+def test_malformed_profiles(tmp_path, profile):
+    path = tmp_path / "profile.json"
+    path.write_text(json.dumps(profile))
+    with pytest.raises(ValueError):
+        load_profile(path)
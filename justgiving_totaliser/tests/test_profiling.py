@@ -0,0 +1,36 @@
+import json
+import pstats
+
+from justgiving_totaliser.profiling import Tracer
+
+
+def recorded():
+    return sum(range(10))
+
+
+def called(path, function):
+    return any(name == function for _, _, name in pstats.Stats(str(path)).stats)
+
+
+def test_save_while_recording(tmp_path):
+    tracer = Tracer()
+    tracer.start(profile=True)
+    try:
+        with tracer.span("first"):
+            pass
+        tracer.save_stats(tmp_path / "first.pstats")
+        tracer.save_trace(tmp_path / "first.json")
+
+        with tracer.span("second"):
+            recorded()
+        tracer.save_stats(tmp_path / "second.pstats")
+        tracer.save_trace(tmp_path / "second.json")
+    finally:
+        tracer.stop()
+
+    assert not called(tmp_path / "first.pstats", "recorded")
+    assert called(tmp_path / "second.pstats", "recorded")
+
+    with open(tmp_path / "second.json") as f:
+        names = [event["name"] for event in json.load(f)["traceEvents"]]
+    assert "first" in names and "second" in names
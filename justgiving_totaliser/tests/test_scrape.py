@@ -0,0 +1,195 @@
+from time import sleep
+
+from justgiving_totaliser import scrape
+from justgiving_totaliser.currency import RateTable
+from justgiving_totaliser.scrape import (
+    LatencyTracker,
+    donor_from_text,
+    parse_amount_text,
+)
+from justgiving_totaliser.types import Donor
+
+
+def test_parse_amount_text():
+    assert parse_amount_text("£10.00 + £2.50 Gift Aid") == (1000, "GBP", 250)
+    assert parse_amount_text("$1,000") == (100000, "USD", 0)
+    assert parse_amount_text("Amount hidden") is None
+
+
+def test_donor_amount_text():
+    donor = donor_from_text("Name", "Comment", "£1,010.00 + £252.50 Gift Aid")
+
+    assert donor.amount == 101000
+    assert donor.amount_text == "£1,010.00 + £252.50 Gift Aid"
+    assert donor.base_amount_text == "£1,010.00"
+    assert donor == donor_from_text("Name", "Comment", "£1,010.00 + £252.50 Gift Aid")
+
+
+def test_parse_amount():
+    amount = scrape.parse_amount("£10.00 + £2.50 Gift Aid")
+
+    assert amount is scrape.parse_amount("£10.00 + £2.50 Gift Aid")
+    assert amount.total() == 1000
+    assert amount.total(include_gift_aid=True) == 1250
+    assert amount.format() == "£10.00"
+    assert amount.format(include_gift_aid=True) == "£12.50"
+    assert amount.describe() == "£10.00 + £2.50 Gift Aid"
+
+    assert scrape.parse_amount("Amount hidden").hidden
+    unknown = scrape.parse_amount("Lots + more")
+    assert not unknown.hidden
+    assert unknown.total() is None
+    assert unknown.format() == "Lots"
+
+
+def test_latency_quantile():
+    tracker = LatencyTracker(size=100, min_samples=10)
+    for i in range(9):
+        tracker.record("example.com", i)
+    assert tracker.quantile("example.com") is None
+
+    for i in range(9, 100):
+        tracker.record("example.com", i)
+    assert tracker.quantile("example.com") == 95
+    assert tracker.quantile("other.com") is None
+
+
+def donations_page(ids, has_previous):
+    nodes = [
+        {
+            "id": str(i),
+            "amount": {"currencyCode": "GBP", "value": 100 * i},
+            "message": None,
+            "displayName": f"Donor {i}",
+        }
+        for i in ids
+    ]
+    page_info = {"hasPreviousPage": has_previous, "startCursor": f"before {ids[-1]}"}
+    return {"data": {"page": {"donations": {"pageInfo": page_info, "nodes": nodes}}}}
+
+
+def test_hedged_loser_is_closed(monkeypatch):
+    class Response:
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    responses = []
+    calls = []
+
+    def fetch_once(method, url, host, **kwargs):
+        calls.append(url)
+        response = Response()
+        responses.append(response)
+        if len(calls) == 1:
+            sleep(0.2)
+        return response
+
+    tracker = LatencyTracker(min_samples=1)
+    tracker.record("example.com", 0.01)
+    monkeypatch.setattr(scrape, "latencies", tracker)
+    monkeypatch.setattr(scrape, "MIN_HEDGE_DELAY", 0.01)
+    monkeypatch.setattr(scrape, "_fetch_once", fetch_once)
+
+    winner = scrape.fetch("GET", "https://example.com/", stream=True)
+    sleep(0.3)
+
+    assert len(responses) == 2
+    assert not winner.closed
+    assert [response.closed for response in responses if response is not winner] == [
+        True
+    ]
+
+
+def test_missed_donations_pages_back(monkeypatch):
+    pages = iter([donations_page([9, 8, 7], True), donations_page([6, 5, 4], True)])
+    monkeypatch.setattr(scrape, "query_graphql", lambda query, **variables: next(pages))
+    seen = [Donor("Donor 5", None, 500, "GBP", id="5")]
+
+    missed, complete = scrape.get_missed_donations(
+        "https://www.justgiving.com/page/test", seen, page_size=3
+    )
+    assert [donor.id for donor in missed] == ["9", "8", "7", "6"]
+    assert complete
+
+
+def test_missed_donations_skip_lookalikes(monkeypatch):
+    def node(id, name, amount):
+        amount = {"currencyCode": "GBP", "value": amount}
+        return {"id": id, "amount": amount, "message": None, "displayName": name}
+
+    def page(nodes, has_previous):
+        page_info = {"hasPreviousPage": has_previous, "startCursor": nodes[-1]["id"]}
+        return {
+            "data": {"page": {"donations": {"pageInfo": page_info, "nodes": nodes}}}
+        }
+
+    pages = iter(
+        [
+            page([node("7", "B", 1000), node("6", "Anonymous", 500)], True),
+            page([node("5", "C", 300), node("4", "Anonymous", 500)], True),
+            page([node("3", "A", 1000), node("2", "D", 200)], False),
+        ]
+    )
+    monkeypatch.setattr(scrape, "query_graphql", lambda query, **variables: next(pages))
+    # Scraped from the page, so without ids
+    seen = [Donor("Anonymous", None, 500, "GBP"), Donor("A", None, 1000, "GBP")]
+
+    missed, complete = scrape.get_missed_donations(
+        "https://www.justgiving.com/page/test", seen, page_size=2
+    )
+    assert [donor.id for donor in missed] == ["7", "6", "5"]
+    assert complete
+
+
+class FakeStream:
+    url = "https://www.justgiving.com/page/test"
+    encoding = "utf-8"
+    raw = None
+
+    def __init__(self, body, chunk_size):
+        self.chunks = [
+            body[i : i + chunk_size] for i in range(0, len(body), chunk_size)
+        ]
+        self.read = 0
+        self.closed = False
+
+    def iter_content(self, _):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+def test_read_page_stops_early():
+    supporter = b'<div class="SupporterDetails_content_x"><p>Name</p></div>'
+    body = b"<dl><dd>raised of</dd></dl>" + supporter * 10 + b"<footer/>" * 100
+    response = FakeStream(body, 7)
+
+    markup = scrape.read_page(response, 3)
+
+    assert response.closed
+    assert response.read < len(response.chunks) // 2
+    assert markup.count(b"SupporterDetails_content") == 3
+    assert markup.endswith(b"</div>")
+
+    parsed = scrape.parse_page(markup, response.encoding)
+    assert [donor.name for donor in parsed.donors] == ["Name"] * 3
+
+
+def test_page_totals_converted_after_parsing(monkeypatch):
+    markup = (
+        "<div><span>£10</span><div><p>raised of</p> <span>$40</span></div></div>"
+    ).encode()
+
+    parsed = scrape.parse_page(markup, "utf-8")
+    assert parsed.totals_text["get_totals"] == ("£10", "$40")
+
+    monkeypatch.setattr(scrape, "RATES", RateTable("GBP", {"USD": 2}))
+    raised, target, currency = scrape.totals_from_text(
+        *parsed.totals_text["get_totals"]
+    )
+    assert (raised, target, currency) == (10, 20, "£")
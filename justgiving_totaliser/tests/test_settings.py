@@ -0,0 +1,109 @@
+from time import sleep
+
+import pytest
+from PyQt5.QtCore import QCoreApplication, QSettings
+
+from justgiving_totaliser.settings import CachedSettings
+
+
+class FakeBackend:
+    def __init__(self, values=None):
+        self.values = dict(values or {})
+        self.reads = 0
+        self.writes = []
+        self.removed = []
+        self.syncs = 0
+
+    def allKeys(self):
+        return list(self.values)
+
+    def value(self, key):
+        self.reads += 1
+        return self.values[key]
+
+    def setValue(self, key, value):
+        self.writes.append(key)
+        self.values[key] = value
+
+    def remove(self, key):
+        self.removed.append(key)
+        del self.values[key]
+
+    def sync(self):
+        self.syncs += 1
+
+    def status(self):
+        return QSettings.NoError
+
+
+@pytest.fixture(scope="module")
+def application():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+def test_reads_come_from_cache(application):
+    backend = FakeBackend({"url": "x", "flag": "true"})
+    settings = CachedSettings(backend=backend)
+    reads = backend.reads
+
+    assert settings.value("url") == "x"
+    assert settings.value("flag", type=bool) is True
+    assert settings.value("missing", 5) == 5
+    assert backend.reads == reads
+
+
+def test_writes_are_batched(application):
+    backend = FakeBackend()
+    settings = CachedSettings(backend=backend, flush_delay=10_000)
+
+    settings.setValue("a", 1)
+    settings.setValue("a", 2)
+    settings.setValue("b", 3)
+    assert settings.value("a") == 2
+    assert backend.writes == []
+
+    settings.flush()
+    assert sorted(backend.writes) == ["a", "b"]
+    assert backend.values == {"a": 2, "b": 3}
+    assert backend.syncs == 1
+
+    settings.flush()
+    assert backend.syncs == 1
+
+
+def test_writes_flush_after_delay(application):
+    backend = FakeBackend()
+    settings = CachedSettings(backend=backend, flush_delay=1)
+
+    settings.setValue("a", 1)
+    for _ in range(50):
+        sleep(0.01)
+        application.processEvents()
+        if backend.syncs:
+            break
+    assert backend.values == {"a": 1}
+
+
+def test_applying_ignores_writes(application):
+    backend = FakeBackend({"a": 1})
+    settings = CachedSettings(backend=backend)
+
+    with settings.applying():
+        settings.setValue("a", 2)
+    settings.flush()
+
+    assert settings.value("a") == 1
+    assert backend.writes == []
+
+
+def test_replace(application):
+    backend = FakeBackend({"a": 1, "b": 2})
+    settings = CachedSettings(backend=backend)
+
+    settings.replace({"b": 3, "c": 4})
+    assert settings.all_values() == {"b": 3, "c": 4}
+    assert not settings.contains("a")
+
+    settings.flush()
+    assert backend.removed == ["a"]
+    assert backend.values == {"b": 3, "c": 4}
@@ -0,0 +1,32 @@
+from decimal import Decimal
+
+from justgiving_totaliser.thresholds import BonusTable
+
+
+def test_bonus_hours_and_next_threshold():
+    table = BonusTable([("500", 1), ("250", 1), ("1000", 2.5)])
+
+    assert table.thresholds == [Decimal(250), Decimal(500), Decimal(1000)]
+    assert table.bonus_hours(Decimal(100)) == 0
+    assert table.next_threshold(Decimal(100)) == Decimal(250)
+    assert table.bonus_hours(Decimal(250)) == 1
+    assert table.next_threshold(Decimal(250)) == Decimal(500)
+    assert table.bonus_hours(Decimal(999)) == 2
+    assert table.bonus_hours(Decimal(5000)) == 4.5
+    assert table.next_threshold(Decimal(5000)) is None
+    assert table.bonus_hours(Decimal(0)) == 0
+
+
+def test_crossed():
+    table = BonusTable((threshold, 0.5) for threshold in range(50, 5001, 50))
+
+    crossed = table.crossed(Decimal(120), Decimal(300))
+    assert [bonus.threshold for bonus in crossed] == [150, 200, 250, 300]
+    assert table.crossed(Decimal(300), Decimal(349)) == []
+
+
+def test_settings_round_trip():
+    table = BonusTable([(Decimal("12.50"), 1.5)])
+
+    assert BonusTable.from_settings(table.to_settings()).bonuses == table.bonuses
+    assert len(BonusTable.from_settings(None)) == 0
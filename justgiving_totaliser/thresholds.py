@@ -0,0 +1,69 @@
+from bisect import bisect_right
+from decimal import Decimal
+from itertools import accumulate
+
+from .types import SingleBonus
+
+
+class BonusTable:
+    """Bonus thresholds sorted by amount, with running totals of bonus hours.
+
+    A threshold counts as reached once the total is at least the threshold."""
+
+    def __init__(self, bonuses=()):
+        self.bonuses = sorted(
+            (
+                SingleBonus(Decimal(str(threshold)), float(bonus))
+                for threshold, bonus in bonuses
+            ),
+            key=lambda bonus: bonus.threshold,
+        )
+        self.thresholds = [bonus.threshold for bonus in self.bonuses]
+        self.cumulative_hours = [
+            0.0,
+            *accumulate(bonus.bonus for bonus in self.bonuses),
+        ]
+        self._cursor = 0
+
+    @classmethod
+    def from_settings(cls, value):
+        return cls(value or [])
+
+    def to_settings(self):
+        return [[str(bonus.threshold), bonus.bonus] for bonus in self.bonuses]
+
+    def __iter__(self):
+        return iter(self.bonuses)
+
+    def __len__(self):
+        return len(self.bonuses)
+
+    def reached(self, total):
+        """Return the number of thresholds at or below `total`."""
+
+        # Totals mostly stay between the same pair of thresholds from one poll
+        # to the next, so check the last answer before searching.
+        cursor = self._cursor
+        if (cursor == 0 or self.thresholds[cursor - 1] <= total) and (
+            cursor == len(self.thresholds) or total < self.thresholds[cursor]
+        ):
+            return cursor
+
+        self._cursor = bisect_right(self.thresholds, total)
+        return self._cursor
+
+    def bonus_hours(self, total):
+        return self.cumulative_hours[self.reached(total)]
+
+    def next_threshold(self, total):
+        index = self.reached(total)
+        if index < len(self.thresholds):
+            return self.thresholds[index]
+        return None
+
+    def crossed(self, old_total, new_total):
+        """Return the bonuses whose thresholds lie in (old_total, new_total]."""
+
+        start = bisect_right(self.thresholds, old_total)
+        end = bisect_right(self.thresholds, new_total)
+        return self.bonuses[start:end]
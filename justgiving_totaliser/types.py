@@ -1,7 +1,157 @@
 from collections import namedtuple
+from datetime import datetime, timezone
 
+from .common import format_amount
 
 Total = namedtuple("Total", ["raised", "target", "currency"])
-Donor = namedtuple("Donor", ["name", "comment", "amount"])
+SingleBonus = namedtuple("SingleBonus", ["threshold", "bonus"])
 
-NULL_DONOR = Donor("", "", "")
+
+class DonationAmount:
+    """How much a single donation was for.
+
+    `value` and `gift_aid` are in minor units (e.g. pence) of `currency`, an
+    ISO 4217 code. If the amount couldn't be understood, `value` is None and
+    `text` holds whatever JustGiving showed instead; if the donor hid the
+    amount, both are None. The text for display is worked out once and then
+    remembered, since the same donation is shown over and over."""
+
+    __slots__ = ("value", "currency", "gift_aid", "text", "_formatted")
+
+    def __init__(self, value=None, currency=None, gift_aid=0, text=None):
+        self.value = value
+        self.currency = currency
+        self.gift_aid = gift_aid or 0
+        self.text = text
+        self._formatted = {}
+
+    def _key(self):
+        return (
+            self.value,
+            self.currency,
+            self.gift_aid,
+            # Only part of the identity when it isn't just a cached formatting
+            self.text if self.value is None else None,
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, DonationAmount):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return f"DonationAmount({self.describe()!r})"
+
+    @property
+    def hidden(self):
+        return self.value is None and self.text is None
+
+    def total(self, include_gift_aid=False):
+        """Return the amount in minor units, or None if it isn't known."""
+
+        if self.value is None:
+            return None
+        return self.value + self.gift_aid if include_gift_aid else self.value
+
+    def format(self, include_gift_aid=False):
+        """The amount for display as a single figure, or None if hidden."""
+
+        if include_gift_aid not in self._formatted:
+            if self.value is not None:
+                text = format_amount(self.total(include_gift_aid), self.currency)
+            elif self.text is not None and not include_gift_aid:
+                text = self.text.split("+")[0].strip()
+            else:
+                text = self.text
+            self._formatted[include_gift_aid] = text
+        return self._formatted[include_gift_aid]
+
+    def describe(self):
+        """The amount for display, with any Gift Aid shown separately."""
+
+        if "described" not in self._formatted:
+            text = self.text
+            if self.value is not None:
+                text = format_amount(self.value, self.currency)
+                if self.gift_aid:
+                    text += f" + {format_amount(self.gift_aid, self.currency)} Gift Aid"
+            self._formatted["described"] = text
+        return self._formatted["described"]
+
+
+HIDDEN_AMOUNT = DonationAmount()
+
+
+class Donor:
+    """A single donation, with its amount as a DonationAmount."""
+
+    __slots__ = ("name", "comment", "donation_amount", "timestamp", "id")
+
+    def __init__(
+        self,
+        name,
+        comment,
+        amount=None,
+        currency=None,
+        gift_aid=0,
+        timestamp=None,
+        id=None,
+        amount_text=None,
+        donation_amount=None,
+    ):
+        self.name = name
+        self.comment = comment
+        if donation_amount is None:
+            if amount is None and amount_text is None:
+                donation_amount = HIDDEN_AMOUNT
+            else:
+                donation_amount = DonationAmount(
+                    amount, currency, gift_aid, amount_text
+                )
+        self.donation_amount = donation_amount
+        self.timestamp = timestamp or datetime.now(timezone.utc)
+        self.id = id
+
+    def _key(self):
+        return (self.id, self.name, self.comment, self.donation_amount)
+
+    def __eq__(self, other):
+        if not isinstance(other, Donor):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return f"Donor({self.name!r}, {self.comment!r}, {self.amount_text!r})"
+
+    @property
+    def amount(self):
+        return self.donation_amount.value
+
+    @property
+    def currency(self):
+        return self.donation_amount.currency
+
+    @property
+    def gift_aid(self):
+        return self.donation_amount.gift_aid
+
+    @property
+    def amount_text(self):
+        """The amount for display, including any Gift Aid."""
+
+        return self.donation_amount.describe()
+
+    @property
+    def base_amount_text(self):
+        """The amount for display, without any Gift Aid."""
+
+        return self.donation_amount.format()
+
+
+NULL_DONOR = Donor("", "", amount_text="")
@@ -0,0 +1,83 @@
+import logging
+import sys
+import threading
+from time import monotonic, perf_counter
+import traceback
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from .metrics import gui_stall_seconds, gui_stalls
+from .profiling import TRACER
+
+
+class StallWatchdog(QObject):
+    """Watch from another thread for the GUI event loop getting stuck.
+
+    A timer on the GUI thread records a heartbeat. If the watchdog thread sees
+    no heartbeat for `threshold` seconds, it logs what the GUI thread is doing
+    at that moment; once the loop recovers, `stalled` is emitted on the GUI
+    thread with how long it was stuck for and the stack that was captured."""
+
+    stalled = pyqtSignal(float, str)
+
+    def __init__(self, threshold=0.5, heartbeat_interval=100):
+        super().__init__()
+        self.threshold = threshold
+        self.count = 0
+
+        self._last_beat = monotonic()
+        self._stall_stack = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._gui_thread = threading.main_thread().ident
+        self._thread = threading.Thread(
+            target=self.watch, name="StallWatchdog", daemon=True
+        )
+
+        self.heartbeat = QTimer(self)
+        self.heartbeat.setInterval(heartbeat_interval)
+        self.heartbeat.timeout.connect(self.beat)
+
+    def start(self):
+        self._last_beat = monotonic()
+        self.heartbeat.start()
+        self._thread.start()
+
+    def stop(self):
+        self.heartbeat.stop()
+        self._stopping.set()
+
+    def beat(self):
+        now = monotonic()
+        with self._lock:
+            stall_stack = self._stall_stack
+            last_beat = self._last_beat
+            self._stall_stack = None
+            self._last_beat = now
+
+        if stall_stack is not None:
+            duration = now - last_beat
+            self.count += 1
+            gui_stalls.inc()
+            gui_stall_seconds.observe(duration)
+            if TRACER.enabled:
+                TRACER.add_span("GUI stall", perf_counter() - duration, perf_counter())
+            logging.warning(f"GUI thread was stalled for {duration:.2f}s")
+            self.stalled.emit(duration, stall_stack)
+
+    def watch(self):
+        while not self._stopping.wait(self.threshold / 4):
+            with self._lock:
+                stuck_for = monotonic() - self._last_beat
+                already_caught = self._stall_stack is not None
+            if stuck_for < self.threshold or already_caught:
+                continue
+
+            frame = sys._current_frames().get(self._gui_thread)
+            stack = "".join(traceback.format_stack(frame)) if frame else ""
+            logging.warning(
+                f"GUI thread hasn't responded for {stuck_for:.2f}s; "
+                f"it is currently at:\n{stack}"
+            )
+            with self._lock:
+                self._stall_stack = stack
@@ -1,4 +1,3 @@
-from collections import namedtuple
 from decimal import Decimal
 
 from PyQt5.QtGui import QDoubleValidator
@@ -13,7 +12,7 @@ from PyQt5.QtWidgets import (
     QWidget,
 )
 
-SingleBonus = namedtuple("SingleBonus", ["threshold", "bonus"])
+from ..types import SingleBonus
 
 
 class SingleBonusWidget(QWidget):
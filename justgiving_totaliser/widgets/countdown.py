@@ -20,6 +20,7 @@ from .mixins import (
     ControllableBackgroundAndTextColour,
     HideTitleBarOptional,
 )
+from ..profiling import traced
 from ..settings import DEFAULT_FONT
 
 
@@ -56,6 +57,8 @@ class Countdown(
 ):
     refresh_interval = 250
     event_finish = pyqtSignal()
+    end_time_changed = pyqtSignal(object)
+    time_remaining_changed = pyqtSignal(object)
 
     def __init__(self, parent=None):
         super().__init__(parent=parent)
@@ -65,8 +68,10 @@ class Countdown(
         self.settings = None
         self._start_time = None
         self._target_length = None
-
-        self.bonus_time = []
+        self._bonus_time = timedelta()
+        self._extra_time = []
+        self._extra_time_total = timedelta()
+        self._end_time = None
 
         self.label = QLabel("...")
         self.label.setFont(QFont(DEFAULT_FONT, 72))
@@ -129,28 +134,55 @@ class Countdown(
 
         self._target_length = settings.value("countdown/target_length", None)
         self._extra_time = settings.value("countdown/extra_time", [])
+        self._extra_time_total = sum(self._extra_time, timedelta())
+        self.update_end_time()
         self.consider_starting()
 
     def consider_starting(self):
         if self.start_time and self.target_length:
             self.timer.start(self.refresh_interval)
+        elif self.timer.isActive():
+            self.timer.stop()
+            self.label.setText("...")
+
+    @property
+    def end_time(self):
+        return self._end_time
+
+    def update_end_time(self):
+        if self.start_time is None or self.target_length is None:
+            end_time = None
+        else:
+            end_time = (
+                self.start_time
+                + self.target_length
+                + self.bonus_time
+                + self._extra_time_total
+            )
+
+        if end_time != self._end_time:
+            self._end_time = end_time
+            logging.info(f"End time is now {end_time}")
+            self.end_time_changed.emit(end_time)
 
+    @traced("Countdown.refresh_time")
     def refresh_time(self):
-        end_time = (
-            self.start_time
-            + self.target_length
-            + sum(self.bonus_time, timedelta())
-            + sum(self.extra_time, timedelta())
-        )
-        time_left = (end_time - datetime.now(timezone.utc)).total_seconds()
-        if time_left < 0:
+        if self.end_time is None:
+            return
+
+        time_left = self.end_time - datetime.now(timezone.utc)
+        if time_left < timedelta():
             if self.label.text() != "FINISHED!":
                 self.label.setText("FINISHED!")
+                self.time_remaining_changed.emit(timedelta())
                 self.event_finish.emit()
         else:
-            hours, remainder = divmod(time_left, 60 * 60)
+            hours, remainder = divmod(int(time_left.total_seconds()), 60 * 60)
             minutes, seconds = divmod(remainder, 60)
-            self.label.setText(f"{int(hours)}:{int(minutes):02}:{int(seconds):02}")
+            text = f"{hours}:{minutes:02}:{seconds:02}"
+            if self.label.text() != text:
+                self.label.setText(text)
+                self.time_remaining_changed.emit(time_left)
 
     @property
     def start_time(self):
@@ -158,12 +190,13 @@ class Countdown(
 
     @start_time.setter
     def start_time(self, start_time):
-        if not start_time.tzinfo:
+        if start_time is not None and not start_time.tzinfo:
             logging.warning("Provided start_time was not time-zone aware.")
             start_time = start_time.astimezone()
         self._start_time = start_time
         if self.settings:
             self.settings.setValue("countdown/start_time", start_time)
+        self.update_end_time()
         self.consider_starting()
         logging.info(f"Set start time to {start_time} at {datetime.now()}")
 
@@ -176,17 +209,30 @@ class Countdown(
         self._target_length = target_length
         if self.settings:
             self.settings.setValue("countdown/target_length", target_length)
+        self.update_end_time()
         self.consider_starting()
         logging.info(f"Set target length to {target_length} at {datetime.now()}")
 
+    @property
+    def bonus_time(self):
+        return self._bonus_time
+
+    @bonus_time.setter
+    def bonus_time(self, bonus_time):
+        if bonus_time != self._bonus_time:
+            self._bonus_time = bonus_time
+            self.update_end_time()
+
     @property
     def extra_time(self):
         return self._extra_time
 
     def add_extra_time(self, extra_time):
         self._extra_time.append(extra_time)
+        self._extra_time_total += extra_time
         if self.settings:
             self.settings.setValue("countdown/extra_time", self._extra_time)
+        self.update_end_time()
 
     def set_start_time(self):
         if self.start_time is not None:
@@ -266,9 +312,10 @@ class Countdown(
         self.timer.stop()
         self.label.setText("...")
 
+        self._extra_time = []
+        self._extra_time_total = timedelta()
         self.start_time = None
         self.target_length = None
-        self._extra_time = []
 
         if self.settings:
             self.settings.setValue("countdown/extra_time", [])
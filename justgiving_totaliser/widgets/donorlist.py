@@ -24,9 +24,11 @@ class ElidingLabel(QLabel):
 class SingleDonor(QWidget):
     _donor = None
 
-    def __init__(self, parent=None):
+    def __init__(self, include_gift_aid=False, parent=None):
         super().__init__(parent=parent)
 
+        self.include_gift_aid = include_gift_aid
+
         self.layout = QHBoxLayout()
         self.name = ElidingLabel("")
         self.name.setFont(QFont(DEFAULT_FONT, 24))
@@ -48,18 +50,8 @@ class SingleDonor(QWidget):
     def donor(self, donor):
         self._donor = donor
         self.name.setText(donor.name)
-        if donor.amount is None:
-            self.amount.setText("???")
-        elif donor.amount.split():
-            amount = []
-            for element in donor.amount.split():
-                if element == "+":
-                    break
-                amount.append(element)
-
-            self.amount.setText(" ".join(amount))
-        else:
-            self.amount.setText("")
+        amount = donor.donation_amount.format(self.include_gift_aid)
+        self.amount.setText("???" if amount is None else amount)
 
 
 class DonorList(
@@ -69,6 +61,7 @@ class DonorList(
     HideTitleBarOptional,
 ):
     _donors = None
+    _include_gift_aid = False
 
     def __init__(self, num_donors=10, parent=None):
         super().__init__(parent=parent)
@@ -86,6 +79,18 @@ class DonorList(
         self._num_donors = num_donors
         self.set_up_widgets(num_donors)
 
+    @property
+    def include_gift_aid(self):
+        return self._include_gift_aid
+
+    @include_gift_aid.setter
+    def include_gift_aid(self, include_gift_aid):
+        self._include_gift_aid = include_gift_aid
+        for donor_widget in self.donor_widgets:
+            donor_widget.include_gift_aid = include_gift_aid
+        if self.donors:
+            self.donors = self.donors
+
     def set_up_widgets(self, num_donors):
         if isinstance(self.layout, QVBoxLayout):
             QWidget().setLayout(self.layout)
@@ -96,7 +101,7 @@ class DonorList(
 
         self.donor_widgets = []
         for _ in range(num_donors):
-            donor_widget = SingleDonor()
+            donor_widget = SingleDonor(self.include_gift_aid)
             self.donor_widgets.append(donor_widget)
             self.layout.addWidget(donor_widget)
 
@@ -49,8 +49,9 @@ class LatestDonor(
     @donor.setter
     def donor(self, donor):
         self._donor = donor
-        if donor.amount is None:
+        amount = donor.donation_amount.describe()
+        if amount is None:
             self.name.setText(f"{donor.name}")
         else:
-            self.name.setText(f"{donor.name}: {donor.amount}")
+            self.name.setText(f"{donor.name}: {amount}")
         self.message.setText(donor.comment)
@@ -0,0 +1,80 @@
+from itertools import zip_longest
+
+from PyQt5.QtWidgets import QVBoxLayout, QWidget
+
+from .donorlist import SingleDonor
+from .mixins import (
+    SaveSizeAndPositionOnClose,
+    ControllableBackgroundAndTextColour,
+    HideTitleBarOptional,
+)
+from ..donors import TopDonations
+from ..types import NULL_DONOR
+
+
+class Leaderboard(
+    QWidget,
+    SaveSizeAndPositionOnClose,
+    ControllableBackgroundAndTextColour,
+    HideTitleBarOptional,
+):
+    _include_gift_aid = False
+
+    def __init__(self, num_donors=5, parent=None):
+        super().__init__(parent=parent)
+
+        self.resize(250, 250)
+        self.top = TopDonations(num_donors)
+        self.num_donors = num_donors
+        self.setWindowTitle("JustGiving Top Donors")
+
+    @property
+    def num_donors(self):
+        return self.top.size
+
+    @num_donors.setter
+    def num_donors(self, num_donors):
+        self.top.size = num_donors
+        self.set_up_widgets(num_donors)
+
+    @property
+    def include_gift_aid(self):
+        return self._include_gift_aid
+
+    @include_gift_aid.setter
+    def include_gift_aid(self, include_gift_aid):
+        self._include_gift_aid = include_gift_aid
+        for donor_widget in self.donor_widgets:
+            donor_widget.include_gift_aid = include_gift_aid
+        self.show_donors()
+
+    def set_up_widgets(self, num_donors):
+        if isinstance(self.layout, QVBoxLayout):
+            QWidget().setLayout(self.layout)
+
+        self.layout = QVBoxLayout()
+        self.layout.setSpacing(0)
+        self.layout.setContentsMargins(10, 0, 10, 0)
+
+        self.donor_widgets = []
+        for _ in range(num_donors):
+            donor_widget = SingleDonor(self.include_gift_aid)
+            self.donor_widgets.append(donor_widget)
+            self.layout.addWidget(donor_widget)
+
+        self.setLayout(self.layout)
+        self.show_donors()
+
+    def add_donors(self, donors, check_duplicates=False):
+        if self.top.add(donors, check_duplicates):
+            self.show_donors()
+
+    def reset(self):
+        self.top = TopDonations(self.num_donors, self.top.value)
+        self.show_donors()
+
+    def show_donors(self):
+        for donor, donor_widget in zip_longest(
+            self.top.donors, self.donor_widgets, fillvalue=NULL_DONOR
+        ):
+            donor_widget.donor = donor
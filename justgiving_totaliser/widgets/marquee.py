@@ -5,6 +5,7 @@ from PyQt5.QtGui import QBrush, QColor, QFont, QFontMetrics, QPainter, QTextDocu
 from PyQt5.QtWidgets import QWidget
 
 from ..common import format_donor
+from ..profiling import traced
 from ..settings import DEFAULT_FONT
 from .mixins import SaveSizeAndPositionOnClose, HideTitleBarOptional
 
@@ -90,6 +91,7 @@ class Marquee(QWidget, SaveSizeAndPositionOnClose, HideTitleBarOptional):
             self._donor_iterator = iter(self._donors)
             return next(self._donor_iterator)
 
+    @traced("Marquee.translate")
     def translate(self):
         if not self.paused:
             if -self.x < self.document.textWidth():
@@ -99,6 +101,7 @@ class Marquee(QWidget, SaveSizeAndPositionOnClose, HideTitleBarOptional):
                 self.setText(format_donor(self.get_next_donor()))
         self.repaint()
 
+    @traced("Marquee.paintEvent")
     def paintEvent(self, event):
         if self.document:
             p = QPainter(self)
@@ -0,0 +1,39 @@
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QFontDatabase
+from PyQt5.QtWidgets import QPlainTextEdit, QVBoxLayout, QWidget
+
+from ..metrics import METRICS
+
+
+class MetricsPanel(QWidget):
+    refresh_interval = 1000
+
+    def __init__(self, registry=METRICS, parent=None):
+        super().__init__(parent=parent)
+
+        self.registry = registry
+        self.setWindowTitle("JustGiving Metrics")
+        self.resize(600, 400)
+
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+
+        self.layout = QVBoxLayout()
+        self.layout.addWidget(self.text)
+        self.setLayout(self.layout)
+
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.refresh)
+
+    def refresh(self):
+        self.text.setPlainText(self.registry.render_text() or "Nothing yet")
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start(self.refresh_interval)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
@@ -0,0 +1,73 @@
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import QLabel, QVBoxLayout, QWidget
+
+from ..settings import DEFAULT_FONT
+from ..types import Total
+from .mixins import (
+    SaveSizeAndPositionOnClose,
+    ControllableBackgroundAndTextColour,
+    HideTitleBarOptional,
+)
+
+
+def format_eta(eta):
+    if eta is None:
+        return "\N{EM DASH}"
+    minutes = round(eta.total_seconds() / 60)
+    if minutes < 1:
+        return "any moment"
+    if minutes < 90:
+        return f"~{minutes} min"
+    return f"~{minutes / 60:.1f} h"
+
+
+class Momentum(
+    QWidget,
+    SaveSizeAndPositionOnClose,
+    ControllableBackgroundAndTextColour,
+    HideTitleBarOptional,
+):
+    # Converts Totals for display, if set
+    to_display = None
+
+    def __init__(self, parent=None):
+        super().__init__(parent=parent)
+
+        self.resize(500, 100)
+
+        self.layout = QVBoxLayout()
+        self.layout.setSpacing(0)
+        self.layout.setContentsMargins(0, 0, 0, 0)
+
+        self.rate = QLabel("")
+        self.rate.setAlignment(Qt.AlignCenter)
+        self.rate.setFont(QFont(DEFAULT_FONT, 24))
+        self.layout.addWidget(self.rate)
+
+        self.eta = QLabel("")
+        self.eta.setAlignment(Qt.AlignCenter)
+        self.eta.setFont(QFont(DEFAULT_FONT, 18))
+        self.layout.addWidget(self.eta)
+
+        self.setLayout(self.layout)
+        self.setWindowTitle("JustGiving Momentum")
+
+    def show_analytics(self, analytics, currency, next_threshold, target):
+        per_hour = analytics.per_hour()
+        if per_hour is None:
+            self.rate.setText("Warming up\N{HORIZONTAL ELLIPSIS}")
+        else:
+            if self.to_display:
+                per_hour, _, currency = self.to_display(Total(per_hour, None, currency))
+            self.rate.setText(
+                f"{currency}{per_hour:,.0f}/hour \N{MIDDLE DOT} "
+                f"{analytics.donations_per_minute():.1f} donations/min"
+            )
+
+        parts = []
+        if next_threshold is not None:
+            parts.append(f"Next bonus {format_eta(analytics.time_to(next_threshold))}")
+        if target:
+            parts.append(f"Target {format_eta(analytics.time_to(target))}")
+        self.eta.setText(" \N{MIDDLE DOT} ".join(parts))
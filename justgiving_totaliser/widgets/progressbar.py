@@ -2,7 +2,9 @@ from PyQt5.QtCore import Qt, QRect, QSize
 from PyQt5.QtGui import QBrush, QFont, QPainter, QPen
 from PyQt5.QtWidgets import QLabel, QVBoxLayout, QWidget
 
+from ..profiling import traced
 from ..settings import DEFAULT_FONT
+from ..types import Total
 from .mixins import (
     SaveSizeAndPositionOnClose,
     HideTitleBarOptional,
@@ -13,6 +15,9 @@ from .mixins import (
 class ProgressBar(QWidget):
     totals = None
     next_threshold = None
+    # Converts Totals for display, if set; the bar itself is drawn from the
+    # unconverted totals, like the thresholds
+    to_display = None
 
     _bar_colour = Qt.green
     _text_colour = Qt.darkGreen
@@ -38,6 +43,7 @@ class ProgressBar(QWidget):
     def minimumSizeHint(self):
         return QSize(0, 100)
 
+    @traced("ProgressBar.paintEvent")
     def paintEvent(self, event):
         painter = QPainter(self)
 
@@ -61,12 +67,15 @@ class ProgressBar(QWidget):
                 margin, margin, int(min(raised / target, 1) * box_width), box_height
             )
 
+            shown_raised, shown_target, currency = (
+                self.to_display(self.totals) if self.to_display else self.totals
+            )
             painter.setPen(self.text_colour)
             painter.setFont(QFont(DEFAULT_FONT, 30))
             painter.drawText(
                 QRect(margin, margin, box_width, box_height),
                 Qt.AlignCenter,
-                f"{currency}{raised} / {currency}{target}",
+                f"{currency}{shown_raised} / {currency}{shown_target}",
             )
 
             # Draw next threshold
@@ -132,6 +141,21 @@ class ProgressBarWindow(
         self._bar_text_colour = colour
         self.update()
 
+    @property
+    def to_display(self):
+        return self.progress_bar.to_display
+
+    @to_display.setter
+    def to_display(self, to_display):
+        self.progress_bar.to_display = to_display
+        self.refresh()
+
+    def refresh(self):
+        """Show the totals again, after the way they are displayed changes."""
+
+        self.totals = self.totals
+        self.progress_bar.update()
+
     @property
     def totals(self):
         return self._totals
@@ -154,6 +178,10 @@ class ProgressBarWindow(
         if self.totals and next_threshold:
             raised, target, currency = self.totals
             left_to_next_threshold = next_threshold - raised
+            if self.to_display:
+                left_to_next_threshold, _, currency = self.to_display(
+                    Total(left_to_next_threshold, None, currency)
+                )
             self.next_threshold_label.setText(
                 f"{currency}{left_to_next_threshold} left to next bonus"
             )
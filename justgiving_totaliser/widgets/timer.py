@@ -23,6 +23,12 @@ class TimerStatusDisplay(QWidget):
         self._last_check.setAlignment(Qt.AlignCenter)
         self.layout.addWidget(self._last_check)
 
+        self._stalls = QLabel("")
+        self._stalls.setFont(QFont(DEFAULT_FONT, 10))
+        self._stalls.setAlignment(Qt.AlignCenter)
+        self._stalls.hide()
+        self.layout.addWidget(self._stalls)
+
         self.setLayout(self.layout)
 
     @property
@@ -36,7 +42,7 @@ class TimerStatusDisplay(QWidget):
 
     @property
     def status(self):
-        return self._status.text
+        return self._status.text()
 
     @status.setter
     def status(self, text):
@@ -44,16 +50,26 @@ class TimerStatusDisplay(QWidget):
 
     @property
     def last_check(self):
-        return self._last_check.text
+        return self._last_check.text()
 
     @last_check.setter
     def last_check(self, text):
         self._last_check.setText(text)
 
+    @property
+    def stalls(self):
+        return self._stalls.text()
+
+    @stalls.setter
+    def stalls(self, text):
+        self._stalls.setText(text)
+        self._stalls.setVisible(bool(text))
+
 
 class StatusDisplayingTimer(QTimer):
     _colour = None
     last_check = "never"
+    last_success = None
 
     def __init__(self, status_display, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -76,14 +92,21 @@ class StatusDisplayingTimer(QTimer):
         )
         if success:
             self.status_display.status = "Running"
-            self.last_check = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.last_success = datetime.now()
+            self.last_check = self.last_success.strftime("%Y-%m-%d %H:%M:%S")
             self.status_display.colour = "#00a000"
 
-    def update_failedcheck(self, verb=None):
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.status_display.status = "Attempting to connect"
+    def update_failedcheck(self, verb=None, backing_off=False):
+        now = datetime.now()
+        self.status_display.status = (
+            "Backing off" if backing_off else "Attempting to connect"
+        )
+        staleness = ""
+        if self.last_success is not None:
+            minutes = int((now - self.last_success).total_seconds() // 60)
+            staleness = f"; showing data from {minutes} minute(s) ago"
         self.status_display.last_check = (
-            f"Update at {now} failed. Last successfully "
-            f"{verb if verb else 'called'} at {self.last_check}"
+            f"Update at {now:%Y-%m-%d %H:%M:%S} failed. Last successfully "
+            f"{verb if verb else 'called'} at {self.last_check}{staleness}"
         )
         self.status_display.colour = "#606000"